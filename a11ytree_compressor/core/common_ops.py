@@ -98,6 +98,28 @@ def bbox_to_center_tuple(bbox: Dict[str, int]) -> Tuple[int, int]:
     return x + w // 2, y + h // 2
 
 
+# ノード列 → 列指向 (Structure of Arrays) の座標表
+def nodes_to_soa(nodes: List[Node]) -> Dict[str, List[Any]]:
+    """
+    各ノードの bbox を一度だけパースし、座標を列ごとのリストに展開する。
+    すべてのリストは nodes と同じ並び。
+      bboxes : node_bbox_from_raw の結果 (dict)
+      xs / ys / ws / hs : bbox の各成分
+      cxs / cys : bbox_to_center_tuple による中心座標
+    """
+    bboxes = [node_bbox_from_raw(n) for n in nodes]
+    centers = [bbox_to_center_tuple(b) for b in bboxes]
+    return {
+        "bboxes": bboxes,
+        "xs": [b["x"] for b in bboxes],
+        "ys": [b["y"] for b in bboxes],
+        "ws": [b["w"] for b in bboxes],
+        "hs": [b["h"] for b in bboxes],
+        "cxs": [c[0] for c in centers],
+        "cys": [c[1] for c in centers],
+    }
+
+
 # label が長すぎたら100文字にして末尾に "..." をつける
 def truncate_label(label: str, max_len: int = 100, ellipsis: str = "...") -> str:
     if len(label) <= max_len:
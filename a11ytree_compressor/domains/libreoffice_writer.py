@@ -1,5 +1,8 @@
 import re
-from typing import List, Dict, Tuple, Set, Optional, Any
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import count
+from typing import List, Dict, Tuple, Set, FrozenSet, Optional, Any, Iterable, Iterator
 from ..core.engine import BaseA11yCompressor
 from ..core.common_ops import (
     Node, node_bbox_from_raw, bbox_to_center_tuple,
@@ -15,16 +18,37 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
     enable_background_filtering = False
     use_statusbar = True 
 
-    MENU_KEYWORDS: Set[str] = {
+    # intern 済みの frozenset にしておき、同じく intern した name_lower との
+    # 照合がハッシュ後の同一性チェックだけで済むようにする
+    MENU_KEYWORDS: FrozenSet[str] = frozenset(map(sys.intern, (
         # LibreOffice Writer のメニューバー
         "file", "edit", "view", "insert", "format",
         "styles", "table", "form",
         "tools", "window", "help"
-    }
+    )))
 
     MODAL_KEYWORDS: Set[str] = {
     }
 
+    # フォントサイズ表記 ("12 pt" / "12pt" など):
+    # " pt" を含む or "pt" で終わる、を 1 回の走査で判定する
+    _FONT_SIZE_RE = re.compile(r" pt|pt\Z")
+
+    # CONTENT で拾うタグ → (出力プレフィックス, name が空のときの代替名)
+    CONTENT_KINDS: Dict[str, Tuple[str, Optional[str]]] = {
+        "paragraph": ("paragraph", None),
+        "heading": ("heading", None),
+        # 画像はファイル名だけだと分かりづらいので、将来 alt-text などがあればここで使う想定
+        "image": ("image", None),
+        # document-text はページ全体のコンテナなので、名前がなくても許す
+        "document-text": ("document", "LibreOffice Document"),
+    }
+
+    def __init__(self, debug: bool = False):
+        super().__init__(debug=debug)
+        # id(node) → "@ (cx, cy)"。_build_output ごとにリセットする
+        self._center_str_cache: Dict[int, str] = {}
+
     def split_static_ui(self, nodes: List[Node], w: int, h: int) -> Tuple[List[Node], List[Node]]:
         regions = self.get_semantic_regions(nodes, w, h, dry_run=True)
         
@@ -65,6 +89,7 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
         }
 
         LAUNCHER_X_LIMIT = w * 0.05
+        LAUNCHER_W_MAX   = w * 0.06
         TOP_BAR_MAX_Y   = h * 0.20  # 上 20% は「バー領域」
 
         SLIDE_LIST_RIGHT = w * 0.20
@@ -72,64 +97,74 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
         MENUBAR_MAX_Y    = h * 0.10
         MAIN_TOP         = h * 0.15
         MAIN_BOTTOM      = h * 0.95
+        STATUSBAR_MIN_Y  = h * 0.92
 
+        # ノードごとの幾何情報を 1 回だけ計算しておく
+        infos = []
         for n in nodes:
             bbox = node_bbox_from_raw(n)
             cx, cy = bbox_to_center_tuple(bbox)
-            x, y, bw, bh = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
-
             tag = (n.get("tag") or "").lower()
-            role = (n.get("role") or "").lower()
-            name = (n.get("name") or n.get("text") or "").strip()
-            name_lower = name.lower()
+            name_lower = sys.intern((n.get("name") or n.get("text") or "").strip().lower())
+            infos.append((bbox, cx, cy, tag, name_lower))
+
+        # 各ノードの振り分け先（None = 未確定。最後に CONTENT へフォールバック）
+        assigned: List[Optional[str]] = [None] * len(nodes)
 
-            # 1. APP_LAUNCHER
-            if x < LAUNCHER_X_LIMIT and bw < w * 0.06 and bh > 30:
+        # 1. APP_LAUNCHER / 2. MODAL は位置に依らないので全ノードを見る
+        for i, (bbox, _cx, _cy, tag, name_lower) in enumerate(infos):
+            if bbox["x"] < LAUNCHER_X_LIMIT and bbox["w"] < LAUNCHER_W_MAX and bbox["h"] > 30:
                 if tag in ("push-button", "toggle-button", "launcher-app"):
-                    regions["APP_LAUNCHER"].append(n)
+                    assigned[i] = "APP_LAUNCHER"
                     continue
 
-            # 2. MODAL
             if any(kw in name_lower for kw in self.MODAL_KEYWORDS):
-                regions["MODAL"].append(n)
-                continue
-
-            # 3. STATUSBAR（最下部）
-            if cy > h * 0.92:
-                if tag in ("statusbar", "status", "label"):
-                    regions["STATUSBAR"].append(n)
-                    continue
+                assigned[i] = "MODAL"
 
-            # 4. 上部バー領域 (MENUBAR / TOOLBAR)
-            if cy < TOP_BAR_MAX_Y:
-                # 4-1) MENUBAR
-                if cy < MENUBAR_MAX_Y and tag == "menu" and name_lower in self.MENU_KEYWORDS:
-                    regions["MENUBAR"].append(n)
-                    continue
-
-                # 4-2) TOOLBAR: 上部にあるボタン・テキスト類はすべてツールバー扱い
-                if tag in (
-                    "push-button", "toggle-button", "combo-box",
-                    "entry", "textbox", "tool-bar", "text"
-                ):
-                    regions["TOOLBAR"].append(n)
-                    continue
+        # 3. 以降は cy で上部 / 中央 / 最下部の帯に分け、該当する帯だけを走査する
+        by_cy = sorted(range(len(nodes)), key=lambda i: infos[i][2])
+        sorted_cys = [infos[i][2] for i in by_cy]
 
-            # 5. メインエリア → SLIDE_LIST / CONTENT / PROPERTIES
-            if MAIN_TOP <= cy <= MAIN_BOTTOM:
-                if cx < SLIDE_LIST_RIGHT:
-                    regions["SLIDE_LIST"].append(n)
-                    continue
+        top_end   = bisect_left(sorted_cys, TOP_BAR_MAX_Y)     # cy <  TOP_BAR_MAX_Y
+        main_lo   = bisect_left(sorted_cys, MAIN_TOP)          # cy >= MAIN_TOP
+        main_hi   = bisect_right(sorted_cys, MAIN_BOTTOM)      # cy <= MAIN_BOTTOM
+        status_lo = bisect_right(sorted_cys, STATUSBAR_MIN_Y)  # cy >  STATUSBAR_MIN_Y
 
-                if cx > PROPERTIES_LEFT:
-                    regions["PROPERTIES"].append(n)
-                    continue
+        # 3. STATUSBAR（最下部）
+        for i in by_cy[status_lo:]:
+            if assigned[i] is None and infos[i][3] in ("statusbar", "status", "label"):
+                assigned[i] = "STATUSBAR"
 
-                regions["CONTENT"].append(n)
+        # 4. 上部バー領域 (MENUBAR / TOOLBAR)
+        for i in by_cy[:top_end]:
+            if assigned[i] is not None:
+                continue
+            _bbox, _cx, cy, tag, name_lower = infos[i]
+
+            # 4-1) MENUBAR
+            if cy < MENUBAR_MAX_Y and tag == "menu" and name_lower in self.MENU_KEYWORDS:
+                assigned[i] = "MENUBAR"
+
+            # 4-2) TOOLBAR: 上部にあるボタン・テキスト類はすべてツールバー扱い
+            elif tag in (
+                "push-button", "toggle-button", "combo-box",
+                "entry", "textbox", "tool-bar", "text"
+            ):
+                assigned[i] = "TOOLBAR"
+
+        # 5. メインエリア → SLIDE_LIST / CONTENT / PROPERTIES
+        for i in by_cy[main_lo:main_hi]:
+            if assigned[i] is not None:
                 continue
+            cx = infos[i][1]
+            if cx < SLIDE_LIST_RIGHT:
+                assigned[i] = "SLIDE_LIST"
+            elif cx > PROPERTIES_LEFT:
+                assigned[i] = "PROPERTIES"
 
-            # 6. フォールバック
-            regions["CONTENT"].append(n)
+        # 元のノード順のまま振り分ける（6. 未確定はフォールバックで CONTENT）
+        for n, region in zip(nodes, assigned):
+            regions[region or "CONTENT"].append(n)
 
         return regions
 
@@ -137,16 +172,17 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
     # === 圧縮系ユーティリティ ===
 
     def _format_center(self, n: Node) -> str:
-        bbox = node_bbox_from_raw(n)
-        cx, cy = bbox_to_center_tuple(bbox)
-        return f"@ ({cx}, {cy})"
+        # 同じノードは複数の圧縮パスから呼ばれるので、整形済み文字列を id(n) で使い回す
+        center_str = self._center_str_cache.get(id(n))
+        if center_str is None:
+            cx, cy = bbox_to_center_tuple(node_bbox_from_raw(n))
+            center_str = self._center_str_cache[id(n)] = f"@ ({cx}, {cy})"
+        return center_str
 
     # === 各領域の圧縮ロジック ===
 
-    def _compress_menubar(self, nodes: List[Node]) -> List[str]:
+    def _compress_menubar(self, nodes: List[Node]) -> Iterator[str]:
         """メニューバー (File / Edit / View / ...) の圧縮"""
-        lines: List[str] = []
-
         # 横並びのメニューをdedup
         deduped = dedup_horizontal_menu_nodes(nodes)
 
@@ -162,11 +198,9 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
                 continue
             seen_names.add(lower)
             center_str = self._format_center(n)
-            lines.append(f"[menu] \"{name}\" {center_str}")
-        return lines
+            yield f"[menu] \"{name}\" {center_str}"
 
-    def _compress_toolbar(self, nodes: List[Node]) -> List[str]:
-        lines = []
+    def _compress_toolbar(self, nodes: List[Node]) -> Iterator[str]:
         for n in nodes:
             name = (n.get("name") or n.get("text") or "").strip()
             if not name:
@@ -180,7 +214,7 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
             if tag in ("text", "entry", "combo-box"):
                 if "normal" in name_lower:
                     prefix = "[style-preset]"
-                elif " pt" in name_lower or name_lower.endswith("pt"):
+                elif self._FONT_SIZE_RE.search(name_lower):
                     prefix = "[font-size]"
                 else:
                     prefix = "[font]"
@@ -191,24 +225,20 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
                 else:
                     prefix = "[toolbar-btn]"
 
-            lines.append(f"{prefix} \"{name}\" {center_str}")
-        return lines
+            yield f"{prefix} \"{name}\" {center_str}"
 
 
-    def _compress_slide_list(self, nodes: List[Node]) -> List[str]:
+    def _compress_slide_list(self, nodes: List[Node]) -> Iterator[str]:
         """左サイドバー用（Writer ではナビゲーター等が入る想定, 現状ほぼ空）"""
-        lines: List[str] = []
         for n in nodes:
             label = (n.get("name") or n.get("text") or "").strip()
             if not label:
                 continue
             center_str = self._format_center(n)
-            lines.append(f"[sidebar-left] {label} {center_str}")
-        return lines
+            yield f"[sidebar-left] {label} {center_str}"
 
-    def _compress_properties(self, nodes: List[Node]) -> List[str]:
+    def _compress_properties(self, nodes: List[Node]) -> Iterator[str]:
         """右サイドバー（プロパティ）の圧縮（暫定：ファイル名等は除外）"""
-        lines = []
         for n in nodes:
             name = (n.get("name") or (n.get("text") or "")).strip()
             if not name:
@@ -228,14 +258,12 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
                 continue
 
             center_str = self._format_center(n)
-            lines.append(f"[prop] \"{name}\" {center_str}")
-        return lines
+            yield f"[prop] \"{name}\" {center_str}"
 
 
 
-    def _compress_statusbar(self, nodes: List[Node]) -> List[str]:
+    def _compress_statusbar(self, nodes: List[Node]) -> Iterator[str]:
         """ステータスバー (ページ番号 / 単語数 / 言語 / ズーム率など)"""
-        lines = []
         for n in nodes:
             name = (n.get("name") or n.get("text") or "").strip()
             if not name:
@@ -247,63 +275,32 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
                 continue
 
             center_str = self._format_center(n)
-            lines.append(f"[status] \"{name}\" {center_str}")
-        return lines
+            yield f"[status] \"{name}\" {center_str}"
 
 
-    def _compress_content(self, nodes: List[Node]) -> List[str]:
+    def _compress_content(self, nodes: List[Node]) -> Iterator[str]:
         """
         本文エリア（中央）の簡易圧縮（Writer初期版）
         - paragraph / heading / image / document-text を対象にする
-        - 各タイプごとに番号を振る
+        - 各タイプごとに番号を振る（CONTENT_KINDS のテーブル駆動）
         """
-        lines: List[str] = []
-
-        para_idx = 1
-        heading_idx = 1
-        image_idx = 1
-        doc_idx = 1  # 複数ページがあれば将来使えるように一応用意
+        # タイプごとの連番カウンタ（出現順は元のノード順のまま）
+        counters = {tag: count(1) for tag in self.CONTENT_KINDS}
 
         for n in nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
             tag = (n.get("tag") or "").lower()
-
-            # document-text はページ全体のコンテナなので、名前がなくても許す
-            if tag != "document-text" and not name:
+            kind = self.CONTENT_KINDS.get(tag)
+            if kind is None:
+                # それ以外は今は無視（必要になったら CONTENT_KINDS に追加）
                 continue
 
-            bbox = node_bbox_from_raw(n)
-            cx, cy = bbox_to_center_tuple(bbox)
-
-            if tag == "paragraph":
-                prefix = f"paragraph-{para_idx}"
-                para_idx += 1
-
-            elif tag == "heading":
-                prefix = f"heading-{heading_idx}"
-                heading_idx += 1
-
-            elif tag == "image":
-                prefix = f"image-{image_idx}"
-                image_idx += 1
-                # 画像はファイル名だけだと分かりづらいので、将来 alt-text などがあればここで使う想定
-
-            elif tag == "document-text":
-                # ページ全体コンテナ。頻繁に出すとうるさいので 1 ページ 1 行程度。
-                prefix = f"document-{doc_idx}"
-                doc_idx += 1
-
-            else:
-                # それ以外は今は無視（必要になったらここに追加）
+            prefix, fallback_name = kind
+            name = (n.get("name") or n.get("text") or "").strip() or fallback_name
+            if not name:
                 continue
 
-            # document-text は name が空のこともあるので fallback
-            if not name and tag == "document-text":
-                name = "LibreOffice Document"
-
-            lines.append(f"[{prefix}] \"{name}\" @ ({cx}, {cy})")
-
-        return lines
+            center_str = self._format_center(n)
+            yield f"[{prefix}-{next(counters[tag])}] \"{name}\" {center_str}"
 
     def _compress_modal(self, nodes: List[Node], w: int, h: int) -> List[str]:
         return self.process_region_lines(nodes, w, h)
@@ -314,90 +311,81 @@ class LibreOfficeWriterCompressor(BaseA11yCompressor):
         ダイアログ内に複製されているメニューバー (File/Edit/...) を
         MODAL から除外する。
         """
+        top = h * 0.20  # 画面上部 20% くらいまで
+        kws = self.MENU_KEYWORDS
         filtered: List[Node] = []
-        TOP_LIMIT = h * 0.20  # 画面上部 20% くらいまで
 
         for n in modal_nodes:
-            tag = (n.get("tag") or "").lower()
-            name = (n.get("name") or n.get("text") or "").strip()
-            name_lower = name.lower()
-            bbox = node_bbox_from_raw(n)
-            _, cy = bbox_to_center_tuple(bbox)
-
             # 画面上部にある menu タグで、メニューキーワードに一致するものは除外
-            if cy < TOP_LIMIT and tag == "menu" and name_lower in self.MENU_KEYWORDS:
-                continue
-
+            #   (tag を先に見て、menu 以外は bbox / 名前を作らない)
+            if (n.get("tag") or "").lower() == "menu":
+                _, cy = bbox_to_center_tuple(node_bbox_from_raw(n))
+                if cy < top and (n.get("name") or n.get("text") or "").strip().lower() in kws:
+                    continue
             filtered.append(n)
 
         return filtered
 
     # === メイン圧縮関数 ===
+    @staticmethod
+    def _section(title: str, lines: Iterable[str]) -> Iterator[str]:
+        """lines が 1 行以上あるときだけ、見出し行 + 本体を流す"""
+        it = iter(lines)
+        first = next(it, None)
+        if first is None:
+            return
+        yield f"{title}:"
+        yield first
+        yield from it
+
     def _build_output(
         self,
         regions: Dict[str, List[Node]],
         modal_nodes: List[Node],
         screen_w: int,
         screen_h: int,
-    ) -> List[str]:
-        lines: List[str] = []
+    ) -> Iterator[str]:
         """
         LibreOffice Writer 向けの初期版コンプレッサ。
         ・UIを MENUBAR / TOOLBAR / CONTENT / PROPERTIES / STATUSBAR / MODAL 等に分割
         ・各領域をそれぞれ簡易なテキストに変換
         instruction_keywords / use_instruction は現状未使用だが、
         API 互換のために受け取っておく。
+        行はジェネレータで流し、呼び出し側 (compress) の "\n".join でまとめる。
         """
+        self._center_str_cache = {}
+
         # APP_LAUNCHER
+        #   (見出しは領域にノードがあれば、本体が空でも出す)
         if regions.get("APP_LAUNCHER"):
-            lines.append("APP_LAUNCHER:")
+            yield "APP_LAUNCHER:"
             # process_region_lines は BaseA11yCompressor のメソッドで、List[str] を返す想定
-            lines.extend(self.process_region_lines(
+            yield from self.process_region_lines(
                 regions["APP_LAUNCHER"], screen_w, screen_h
-            ))
+            )
 
         # MENUBAR
-        menubar_lines = self._compress_menubar(regions.get("MENUBAR", []))
-        if menubar_lines:
-            lines.append("MENUBAR:")
-            lines.extend(menubar_lines)
+        yield from self._section("MENUBAR", self._compress_menubar(regions.get("MENUBAR", [])))
 
         # TOOLBAR
-        toolbar_lines = self._compress_toolbar(regions.get("TOOLBAR", []))
-        if toolbar_lines:
-            lines.append("TOOLBAR:")
-            lines.extend(toolbar_lines)
+        yield from self._section("TOOLBAR", self._compress_toolbar(regions.get("TOOLBAR", [])))
 
         # SLIDE_LIST（Writerではほぼ空だが一応）
-        slide_list_lines = self._compress_slide_list(regions.get("SLIDE_LIST", []))
-        if slide_list_lines:
-            lines.append("SLIDE_LIST:")
-            lines.extend(slide_list_lines)
+        yield from self._section("SLIDE_LIST", self._compress_slide_list(regions.get("SLIDE_LIST", [])))
 
         # STATUSBAR
-        status_lines = self._compress_statusbar(regions.get("STATUSBAR", []))
-        if status_lines:
-            lines.append("STATUSBAR:")
-            lines.extend(status_lines)
+        yield from self._section("STATUSBAR", self._compress_statusbar(regions.get("STATUSBAR", [])))
 
         # PROPERTIES（右サイドバー）
-        prop_lines = self._compress_properties(regions.get("PROPERTIES", []))
-        if prop_lines:
-            lines.append("PROPERTIES:")
-            lines.extend(prop_lines)
+        yield from self._section("PROPERTIES", self._compress_properties(regions.get("PROPERTIES", [])))
 
         # CONTENT（中央本文）
-        content_lines = self._compress_content(regions.get("CONTENT", []))
-        if content_lines:
-            lines.append("CONTENT:")
-            lines.extend(content_lines)
+        yield from self._section("CONTENT", self._compress_content(regions.get("CONTENT", [])))
 
         # MODAL
         if modal_nodes:
             modal_nodes = self._filter_modal_nodes(modal_nodes, screen_w, screen_h)
             if modal_nodes:
-                lines.append("MODAL:")
-                lines.extend(self._compress_modal(modal_nodes, screen_w, screen_h))
-
-        # 他ドメインと同じように dict で返す
-        return lines
\ No newline at end of file
+                # MODAL も APP_LAUNCHER と同じく、ノードが残っていれば見出しを出す
+                yield "MODAL:"
+                yield from self._compress_modal(modal_nodes, screen_w, screen_h)
@@ -1,13 +1,105 @@
 import re
-from typing import List, Dict, Tuple, Set, Optional, Any
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import List, Dict, Tuple, Set, FrozenSet, Optional, Any, Callable
 from ..core.engine import BaseA11yCompressor
 from ..core.common_ops import (
-    Node, node_bbox_from_raw, bbox_to_center_tuple,
+    Node, node_bbox_from_raw, bbox_to_center_tuple, nodes_to_soa,
     build_hierarchical_content_lines, dedup_horizontal_menu_nodes
 )
 from ..a11y_instruction_utils import summarize_calc_instruction
 
 
+# ★領域分類で使うタグ/名前の集合 (ループ内でリテラルを評価しないようモジュール定数にする)
+_LAUNCHER_TAGS: FrozenSet[str] = frozenset({"push-button", "toggle-button", "launcher-app"})
+_TOPBAR_TAGS: FrozenSet[str] = frozenset({
+    "label", "push-button", "toggle-button", "menu",
+    "image", "icon", "text",
+})
+_MODAL_ROLES: FrozenSet[str] = frozenset({"dialog", "alert"})
+_POPUP_ENTRY_TAGS: FrozenSet[str] = frozenset({"entry", "text", "textbox"})
+_DESKTOP_TAGS: FrozenSet[str] = frozenset({"label", "icon", "image", "push-button"})
+# デスクトップアイコンではなくウィンドウ側 (CONTENT) とみなす名前パターン
+#   ウィンドウ制御 / ターミナルのプロンプト・パス / ソフトウェア更新通知
+#   "@" と ":" の両方を含む (user@host:~ 形式) も順不同で同じ1回の検索に含める
+_DESKTOP_TO_CONTENT_RE = re.compile(
+    r"minimize|maximize|close|terminal|software updates|/home/"
+    r"|\A(?:user@|root@|~)"
+    r"|[$#]\Z"
+    r"|@.*:|:.*@",
+    re.DOTALL,
+)
+
+# ウィンドウ領域アンカー判定用
+_WINDOW_PARTS: FrozenSet[str] = frozenset({
+    "check-box", "combo-box", "spin-button", "entry",
+    "terminal", "slider", "switch", "scroll-bar", "menu-bar",
+    "table", "tree-table", "radio-button", "text",
+})
+_WINDOW_BTN_TAGS: FrozenSet[str] = frozenset({"push-button", "toggle-button"})
+_WINDOW_BTN_NAMES: FrozenSet[str] = frozenset({
+    "Close", "Minimize", "Maximize", "Help", "Cancel", "Apply", "OK",
+})
+_WINDOW_CONTAINER_TAGS: FrozenSet[str] = frozenset({"window", "frame", "dialog"})
+# 上記いずれか、またはラベル (Key-Value / 末尾コロン) を持たない画面にはウィンドウ領域は無い
+_WINDOW_ANCHOR_TAGS: FrozenSet[str] = (
+    _WINDOW_PARTS | _WINDOW_BTN_TAGS | _WINDOW_CONTAINER_TAGS | frozenset({"label"})
+)
+
+# 暗転レイヤー (画面を大きく覆うテキスト無しのパネル) になり得るタグ
+_DIM_LAYER_TAGS: FrozenSet[str] = frozenset({"panel", "frame", "image", "static", "text"})
+
+# _format_node_list の tag -> 行頭プレフィックス (無ければ "[text]")
+_TAG_PREFIX: Dict[str, str] = {
+    "push-button": "[btn]", "toggle-button": "[btn]",
+    "check-box": "[check]", "radio-button": "[check]",
+    "entry": "[input]", "text": "[input]", "password-text": "[input]",
+    "combo-box": "[combo]", "menu-button": "[combo]",
+    "spin-button": "[control]", "slider": "[control]", "scroll-bar": "[control]",
+}
+
+# _filter_modal_nodes: これらを含む候補は通常ウィンドウ扱い (モーダルではない)
+_MODAL_IGNORE_TAGS: FrozenSet[str] = frozenset({"terminal", "application", "window", "frame"})
+_MODAL_IGNORE_ROLES: FrozenSet[str] = frozenset({"application", "window", "frame"})
+_WINDOW_CTRL_NAMES: FrozenSet[str] = frozenset({"minimize", "maximize"})
+
+# ウィンドウに属さなかったノードの暗転判定: 基準画面 (1920x1080) での面積しきい値
+_REF_SCREEN_AREA = 1920 * 1080
+_ORPHAN_DIM_AREA = 500000
+
+# ノード→ウィンドウ振り分けで使う x 方向のビン幅
+_WIN_BIN = 100
+
+
+def _assign_to_windows(
+    centers: List[Tuple[float, float]],
+    win_limits: List[Tuple[float, float, float]],
+) -> List[int]:
+    """
+    各中心座標について、最もスコアの低いウィンドウの番号を返す (該当なしは -1)。
+    win_limits: ウィンドウ検出順の (limit_min_x, limit_max_x, header_bottom)
+    スコア = 見出し下端からの垂直距離 + 左右にはみ出した分 x 5。同点なら先のウィンドウ。
+    """
+    # ウィンドウを [limit_min_x-50, limit_max_x+50] を覆うビンに登録 (ビン内は検出順)
+    win_bins: Dict[int, List[Tuple[float, float, float, int]]] = {}
+    for wi, (w_min_x, w_max_x, w_bottom) in enumerate(win_limits):
+        for b in range(int((w_min_x - 50) // _WIN_BIN), int((w_max_x + 50) // _WIN_BIN) + 1):
+            win_bins.setdefault(b, []).append((w_min_x, w_max_x, w_bottom, wi))
+
+    best_idx: List[int] = []
+    for n_cx, n_cy in centers:
+        best, min_score = -1, float("inf")
+        for w_min_x, w_max_x, w_bottom, wi in win_bins.get(int(n_cx // _WIN_BIN), ()):
+            if n_cx > w_max_x + 50 or n_cx < w_min_x - 50: continue
+            dy = n_cy - w_bottom
+            if dy < -10: continue
+            # 左右のはみ出し量 (limit_min_x <= limit_max_x なので高々一方だけが正)
+            score = dy + (max(0.0, w_min_x - n_cx) + max(0.0, n_cx - w_max_x)) * 5.0
+            if score < min_score: min_score, best = score, wi
+        best_idx.append(best)
+    return best_idx
+
+
 class OSCompressor(BaseA11yCompressor):
     domain_name = "os"
     
@@ -23,6 +115,23 @@ class OSCompressor(BaseA11yCompressor):
     MODAL_KEYWORDS: Set[str] = {
         "authentication", "password", "required", "authenticate", "cancel"
     }
+    # ★MODAL_KEYWORDS の部分一致判定を1回の正規表現検索で行う
+    MODAL_KEYWORDS_RE = re.compile("|".join(map(re.escape, sorted(MODAL_KEYWORDS))))
+
+    def __init__(self, debug: bool = False):
+        super().__init__(debug=debug)
+        # ★id(n) -> (n, 小文字 tag, strip 済み表示名, 表示名の小文字)。入力ノードには書き込まない。
+        #   ノードは呼び出し間で書き換わり得るため、各入口で破棄して作り直す
+        self._text_cache: Dict[int, Tuple[Node, str, str, str]] = {}
+
+    def _text(self, n: Node) -> Tuple[str, str, str]:
+        """(小文字 tag, (name or text).strip(), その小文字) のキャッシュ版"""
+        entry = self._text_cache.get(id(n))
+        if entry is None:
+            name = (n.get("name") or n.get("text") or "").strip()
+            entry = (n, (n.get("tag") or "").lower(), name, name.lower())
+            self._text_cache[id(n)] = entry
+        return entry[1], entry[2], entry[3]
 
     def split_static_ui(self, nodes: List[Node], w: int, h: int) -> Tuple[List[Node], List[Node]]:
         """
@@ -42,10 +151,7 @@ class OSCompressor(BaseA11yCompressor):
             "DESKTOP_ICONS",
         ]
 
-        static_ids = set()
-        for group in static_groups:
-            for n in regions.get(group, []):
-                static_ids.add(id(n))
+        static_ids = frozenset(id(n) for group in static_groups for n in regions.get(group, []))
 
         for n in nodes:
             if id(n) in static_ids:
@@ -56,9 +162,9 @@ class OSCompressor(BaseA11yCompressor):
         return dynamic_nodes, static_nodes
 
 
-# サイドバー検出用のキーワード定義
-    SIDEBAR_KEYWORDS_SPECIFIC = {"Recent", "Starred", "Other Locations"}
-    SIDEBAR_KEYWORDS_GENERIC = {
+    # サイドバー検出用のキーワード定義 (定数なので frozenset)
+    SIDEBAR_KEYWORDS_SPECIFIC: FrozenSet[str] = frozenset({"Recent", "Starred", "Other Locations"})
+    SIDEBAR_KEYWORDS_GENERIC: FrozenSet[str] = frozenset({
         "Home", "Desktop", "Documents", "Downloads", 
         "Music", "Pictures", "Videos", "Trash",
         # Settings用に追加
@@ -67,17 +173,28 @@ class OSCompressor(BaseA11yCompressor):
         "Sharing", "Sound", "Power", "Displays", "Mouse & Touchpad",
         "Keyboard", "Printers", "Removable Media", "Color", "Region & Language",
         "Accessibility", "Users", "Date & Time", "About",
-    }
+    })
+    # ★和集合は呼び出しごとに作らずクラス定義時に一度だけ作る
+    SIDEBAR_KEYWORDS_ALL: FrozenSet[str] = SIDEBAR_KEYWORDS_SPECIFIC | SIDEBAR_KEYWORDS_GENERIC
 
-    def _detect_sidebar_region(self, nodes: List[Node]) -> Optional[Dict[str, int]]:
+    def _detect_sidebar_region(
+        self, nodes: List[Node], bbox_map: Optional[Dict[int, Dict[str, int]]] = None
+    ) -> Optional[Dict[str, int]]:
         """
         （前回の修正と同じ：特定のキーワードを持つノードが縦に並んでいるパターンを検出）
+        bbox_map: id(n) -> bbox。呼び出し元で計算済みなら渡して再パースを避ける。
         """
+        # 有効なサイドバーは最低2要素 (特定キーワードあり) 必要
+        if len(nodes) < 2:
+            return None
+        if bbox_map is None:
+            bbox_map = {id(n): node_bbox_from_raw(n) for n in nodes}
+
         candidates = []
-        all_keywords = self.SIDEBAR_KEYWORDS_SPECIFIC | self.SIDEBAR_KEYWORDS_GENERIC
+        all_keywords = self.SIDEBAR_KEYWORDS_ALL
         
         for n in nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
+            name = self._text(n)[1]
             if name in all_keywords:
                 candidates.append(n)
 
@@ -85,7 +202,7 @@ class OSCompressor(BaseA11yCompressor):
             return None
 
         # X座標でソート
-        candidates.sort(key=lambda n: node_bbox_from_raw(n)["x"])
+        candidates.sort(key=lambda n: bbox_map[id(n)]["x"])
 
         best_cluster = []
         current_cluster = []
@@ -96,8 +213,8 @@ class OSCompressor(BaseA11yCompressor):
                 continue
             
             prev = current_cluster[0]
-            bx = node_bbox_from_raw(n)["x"]
-            px = node_bbox_from_raw(prev)["x"]
+            bx = bbox_map[id(n)]["x"]
+            px = bbox_map[id(prev)]["x"]
             
             if abs(bx - px) < 30: 
                 current_cluster.append(n)
@@ -112,16 +229,16 @@ class OSCompressor(BaseA11yCompressor):
         if not best_cluster:
             return None
 
-        names = {(n.get("name") or n.get("text") or "").strip() for n in best_cluster}
+        names = {self._text(n)[1] for n in best_cluster}
         has_specific = bool(names & self.SIDEBAR_KEYWORDS_SPECIFIC)
         
         is_valid = (has_specific and len(best_cluster) >= 2) or len(best_cluster) >= 4
         
         if is_valid:
-            xs = [node_bbox_from_raw(n)["x"] for n in best_cluster]
-            ys = [node_bbox_from_raw(n)["y"] for n in best_cluster]
-            ws = [node_bbox_from_raw(n)["w"] for n in best_cluster]
-            hs = [node_bbox_from_raw(n)["h"] for n in best_cluster]
+            xs = [bbox_map[id(n)]["x"] for n in best_cluster]
+            ys = [bbox_map[id(n)]["y"] for n in best_cluster]
+            ws = [bbox_map[id(n)]["w"] for n in best_cluster]
+            hs = [bbox_map[id(n)]["h"] for n in best_cluster]
             
             min_x, min_y = min(xs), min(ys)
             max_x = max(x + w for x, w in zip(xs, ws))
@@ -135,41 +252,43 @@ class OSCompressor(BaseA11yCompressor):
             }
         return None
 
-    def _detect_breadcrumb_region(self, nodes: List[Node]) -> Optional[Dict[str, int]]:
+    def _detect_breadcrumb_region(
+        self, nodes: List[Node], bbox_map: Optional[Dict[int, Dict[str, int]]] = None
+    ) -> Optional[Dict[str, int]]:
         """
         ★新規追加: パンくずリスト（例: Home / project）を検出する。
         「/」などのセパレータを探し、その同じ高さ(Y座標)にある要素群を領域として返す。
         """
-        # セパレータ候補
+        # セパレータ候補 (無ければ bbox を用意する前に終了)
         separators = [n for n in nodes if (n.get("name") or "").strip() in {"/", ">", "›", "»"}]
         
         if not separators:
             return None
 
+        if bbox_map is None:
+            bbox_map = {id(n): node_bbox_from_raw(n) for n in nodes}
+
         # 最初のセパレータを基準にする
         ref = separators[0]
-        ref_box = node_bbox_from_raw(ref)
+        ref_box = bbox_map[id(ref)]
         ref_cy = ref_box["y"] + ref_box["h"] / 2
         
         # 同じ高さ(Y軸)にあるノードを集める（パンくずの構成要素）
-        cluster = []
+        # ★1回の走査で行判定と外接矩形の更新をまとめて行う (中間リストを作らない)
+        min_x = min_y = max_x = max_y = None
         for n in nodes:
-            b = node_bbox_from_raw(n)
+            b = bbox_map[id(n)]
             cy = b["y"] + b["h"] / 2
             # 高さの差が小さい（例えば20px以内）なら同じ行とみなす
             if abs(cy - ref_cy) < 20:
-                cluster.append(n)
+                x, y = b["x"], b["y"]
+                if min_x is None:
+                    min_x, min_y, max_x, max_y = x, y, x + b["w"], y + b["h"]
+                else:
+                    min_x, min_y = min(min_x, x), min(min_y, y)
+                    max_x, max_y = max(max_x, x + b["w"]), max(max_y, y + b["h"])
         
-        if cluster:
-            xs = [node_bbox_from_raw(n)["x"] for n in cluster]
-            ys = [node_bbox_from_raw(n)["y"] for n in cluster]
-            ws = [node_bbox_from_raw(n)["w"] for n in cluster]
-            hs = [node_bbox_from_raw(n)["h"] for n in cluster]
-            
-            min_x, min_y = min(xs), min(ys)
-            max_x = max(x + w for x, w in zip(xs, ws))
-            max_y = max(y + h for y, h in zip(ys, hs))
-            
+        if min_x is not None:
             # 領域を少し広げて返す
             return {
                 "x": min_x - 20,
@@ -179,65 +298,77 @@ class OSCompressor(BaseA11yCompressor):
             }
         return None
 
-    def _detect_window_content_regions(self, nodes: List[Node]) -> List[Dict[str, int]]:
+    def _detect_window_content_regions(
+        self, nodes: List[Node], bbox_map: Optional[Dict[int, Dict[str, int]]] = None
+    ) -> List[Dict[str, int]]:
         """
         ウィンドウ特有のウィジェットが存在する領域を特定する。
         """
+        # アンカーになり得るタグが1つも無ければ何もしない
+        if not any(self._text(n)[0] in _WINDOW_ANCHOR_TAGS for n in nodes):
+            return []
+        if bbox_map is None:
+            bbox_map = {id(n): node_bbox_from_raw(n) for n in nodes}
+
         anchors = []
         
         # 1. Key-Valueペア検出 (Settingsウィンドウ右側対策)
         # ラベル要素だけを集めて、Y座標でソート
-        labels = [n for n in nodes if (n.get("tag") or "").lower() == "label"]
-        labels.sort(key=lambda n: node_bbox_from_raw(n)["y"])
+        labels = [n for n in nodes if self._text(n)[0] == "label"]
+        labels.sort(key=lambda n: bbox_map[id(n)]["y"])
         
-        matched_kv_ids = set()
-
-        for i, l1 in enumerate(labels):
-            if id(l1) in matched_kv_ids: continue
+        # ★ラベルの座標はループ前に位置インデックス付きの配列へ展開し、
+        #   マッチ済み判定も id の set ではなく位置ベースのフラグで行う
+        l_boxes = [bbox_map[id(n)] for n in labels]
+        l_ys = [b["y"] for b in l_boxes]
+        l_bottoms = [b["y"] + b["h"] for b in l_boxes]
+        l_cys = [b["y"] + b["h"] / 2 for b in l_boxes]
+        l_xs = [b["x"] for b in l_boxes]
+        l_rights = [b["x"] + b["w"] for b in l_boxes]
+        matched = bytearray(len(labels))
+
+        for i in range(len(labels)):
+            if matched[i]: continue
             
-            b1 = node_bbox_from_raw(l1)
+            cy1, bottom1, right1 = l_cys[i], l_bottoms[i], l_rights[i]
             # l1 の右側にある l2 を探す
-            for l2 in labels[i+1:]:
-                if id(l2) in matched_kv_ids: continue
+            for j in range(i + 1, len(labels)):
+                if matched[j]: continue
                 
-                b2 = node_bbox_from_raw(l2)
                 # 高さのズレが10px以内
-                if abs((b2["y"]+b2["h"]/2) - (b1["y"]+b1["h"]/2)) > 10: 
-                    if b2["y"] > b1["y"] + b1["h"]: break # 下の行に行ったら終了
+                if abs(l_cys[j] - cy1) > 10: 
+                    if l_ys[j] > bottom1: break # 下の行に行ったら終了
                     continue
                 
                 # 横位置チェック: l1の右側にあり、かつ近すぎず遠すぎない(300px以内)
-                dist_x = b2["x"] - (b1["x"] + b1["w"])
+                dist_x = l_xs[j] - right1
                 if 0 < dist_x < 300:
                     # Key-Valueペア発見
-                    anchors.extend([l1, l2])
-                    matched_kv_ids.update([id(l1), id(l2)])
+                    anchors.extend([labels[i], labels[j]])
+                    matched[i] = matched[j] = 1
                     break
 
+        matched_kv_ids = {id(n) for n, m in zip(labels, matched) if m}
+
         # 2. 通常アンカー検出
         for n in nodes:
             # 既にKV判定で追加されていればスキップ
             if id(n) in matched_kv_ids: continue
 
-            tag = (n.get("tag") or "").lower()
-            name = (n.get("name") or n.get("text") or "").strip()
+            tag, name, _ = self._text(n)
             
             # A. 明らかなウィンドウ構成部品
-            if tag in {
-                "check-box", "combo-box", "spin-button", "entry", 
-                "terminal", "slider", "switch", "scroll-bar", "menu-bar",
-                "table", "tree-table", "radio-button", "text"
-            }:
+            if tag in _WINDOW_PARTS:
                 anchors.append(n)
             
             # B. ウィンドウ制御ボタン / ダイアログ特有のボタン
             #    "Help" ボタンはダイアログによくあるため追加
-            elif tag in {"push-button", "toggle-button"}:
-                if name in {"Close", "Minimize", "Maximize", "Help", "Cancel", "Apply", "OK"}:
+            elif tag in _WINDOW_BTN_TAGS:
+                if name in _WINDOW_BTN_NAMES:
                     anchors.append(n)
                 
             # C. コンテナそのもの
-            elif tag in {"window", "frame", "dialog"}:
+            elif tag in _WINDOW_CONTAINER_TAGS:
                 anchors.append(n)
 
             # D. ★追加: フォームのラベル（末尾がコロン）
@@ -249,75 +380,145 @@ class OSCompressor(BaseA11yCompressor):
             return []
 
         # アンカー要素をbbox化
-        boxes = [node_bbox_from_raw(n) for n in anchors]
+        boxes = [bbox_map[id(n)] for n in anchors]
         
         # 距離が近いボックス同士をマージして「ウィンドウ領域」を作る
+        # ★変更: 許容距離を拡大 (150 -> 250)
+        # 左サイドバー(General)と右メインパネル(Checkboxes)の間には空白があるため、
+        # 広めのマージンを取って「1つの大きなウィンドウ」として認識させる
+        return self._merge_close_boxes(boxes, tolerance=250)
+
+    def _merge_close_boxes(self, boxes: List[Dict[str, int]], tolerance: int = 100) -> List[Dict[str, int]]:
+        """
+        近いボックス同士を、これ以上吸収できなくなるまでマージする。
+        ★グリッド(セル幅 = tolerance)にボックスを登録し、現在のマージ領域と
+          セルを共有する候補だけを判定する (全ペア走査を避ける)。
+        ★判定・マージは (x1, y1, x2, y2) のタプル上で直接行い、途中で dict を作らない。
+          tolerance だけ広げた範囲で x, y ともに重なれば「近い」とみなし、外接矩形に併合する。
+        先頭から順に種ボックスを取り、吸収の閉包を取る挙動は従来の while ループと同じ。
+        """
+        cell = max(int(tolerance), 1)
+        tol = tolerance
+
+        def cell_range(lo: float, hi: float) -> range:
+            if hi < lo:
+                lo, hi = hi, lo
+            return range(int(lo // cell), int(hi // cell) + 1)
+
+        edges = [(b["x"], b["y"], b["x"] + b["w"], b["y"] + b["h"]) for b in boxes]
+
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, (x1, y1, x2, y2) in enumerate(edges):
+            for gx in cell_range(x1, x2):
+                for gy in cell_range(y1, y2):
+                    grid.setdefault((gx, gy), []).append(i)
+
+        absorbed = [False] * len(boxes)
         merged_boxes = []
-        while boxes:
-            current = boxes.pop(0)
+        for i, (cx1, cy1, cx2, cy2) in enumerate(edges):
+            if absorbed[i]:
+                continue
+            absorbed[i] = True
+            grown = False
             changed = True
             while changed:
                 changed = False
-                remaining = []
-                for other in boxes:
-                    # ★変更: 許容距離を拡大 (150 -> 250)
-                    # 左サイドバー(General)と右メインパネル(Checkboxes)の間には空白があるため、
-                    # 広めのマージンを取って「1つの大きなウィンドウ」として認識させる
-                    if self._boxes_are_close(current, other, tolerance=250):
-                        current = self._merge_bbox(current, other)
-                        changed = True
-                    else:
-                        remaining.append(other)
-                boxes = remaining
-            merged_boxes.append(current)
-            
+                for gx in cell_range(cx1 - tol, cx2 + tol):
+                    for gy in cell_range(cy1 - tol, cy2 + tol):
+                        for j in grid.get((gx, gy), ()):
+                            if absorbed[j]:
+                                continue
+                            ox1, oy1, ox2, oy2 = edges[j]
+                            if (
+                                cx1 <= ox2 + tol and ox1 <= cx2 + tol
+                                and cy1 <= oy2 + tol and oy1 <= cy2 + tol
+                            ):
+                                cx1, cy1 = min(cx1, ox1), min(cy1, oy1)
+                                cx2, cy2 = max(cx2, ox2), max(cy2, oy2)
+                                absorbed[j] = True
+                                changed = grown = True
+            if grown:
+                merged_boxes.append({"x": cx1, "y": cy1, "w": cx2 - cx1, "h": cy2 - cy1})
+            else:
+                merged_boxes.append(boxes[i])
+
         return merged_boxes
 
-    def _boxes_are_close(self, b1, b2, tolerance=100):
-        # 2つの矩形が許容範囲内で重なる/近いか判定
-        x_overlap = (b1["x"] <= b2["x"] + b2["w"] + tolerance) and (b2["x"] <= b1["x"] + b1["w"] + tolerance)
-        y_overlap = (b1["y"] <= b2["y"] + b2["h"] + tolerance) and (b2["y"] <= b1["y"] + b1["h"] + tolerance)
-        return x_overlap and y_overlap
+    @staticmethod
+    def _index_nodes(nodes: List[Node], key: Callable[[Node], Any]) -> Dict[Any, List[int]]:
+        """
+        key(n) -> ノード位置リスト の索引を1パスで作る。
+        同じ条件で何度も nodes 全体を走査する代わりに使う。
+        """
+        index: Dict[Any, List[int]] = {}
+        for i, n in enumerate(nodes):
+            index.setdefault(key(n), []).append(i)
+        return index
 
-    def _merge_bbox(self, b1, b2):
-        min_x = min(b1["x"], b2["x"])
-        min_y = min(b1["y"], b2["y"])
-        max_x = max(b1["x"] + b1["w"], b2["x"] + b2["w"])
-        max_y = max(b1["y"] + b1["h"], b2["y"] + b2["h"])
-        return {"x": min_x, "y": min_y, "w": max_x - min_x, "h": max_y - min_y}
+    @staticmethod
+    def _pick_indexed(nodes: List[Node], index: Dict[Any, List[int]], keys) -> List[Node]:
+        """keys のいずれかに該当するノードを、元の並び順のまま返す。"""
+        return [nodes[i] for i in sorted(i for k in keys for i in index.get(k, ()))]
 
     def get_semantic_regions(
         self, nodes: List[Node], w: int, h: int, dry_run: bool = False
     ) -> Dict[str, List[Node]]:
         """
         OS(ubuntu/gnome) 向けのセマンティック分割。
+        ★dry_run=True (split_static_ui 用) では APP_LAUNCHER / TOP_BAR / DESKTOP_ICONS
+          だけが正しければよいので、静的UIになり得ないノードは強制CONTENT判定を
+          待たずに CONTENT へ送る。
         """
-        regions: Dict[str, List[Node]] = {
-            "APP_LAUNCHER": [],
-            "TOP_BAR": [],
-            "DESKTOP_ICONS": [],
-            "OS_POPUP": [],
-            "MODAL": [],
-            "CONTENT": [],
-        }
+        return self._compute_semantic_regions(nodes, w, h, static_only=dry_run)
+
+    @staticmethod
+    def _is_popup_like(
+        tag: str, name_lower: str, bw: int, bh: int, popup_w_max: float, popup_h_max: float
+    ) -> bool:
+        # 小さな入力欄 / Rename ダイアログ系 (OS_POPUP 候補)
+        return (
+            bw < popup_w_max
+            and bh < popup_h_max
+            and (
+                tag in _POPUP_ENTRY_TAGS
+                or "rename" in name_lower
+                or "folder name" in name_lower
+            )
+        )
 
-        LAUNCHER_X_LIMIT = w * 0.05
-        TOP_BAR_MAX_Y    = h * 0.04
-        
-        sidebar_bbox = self._detect_sidebar_region(nodes)
-        breadcrumb_bbox = self._detect_breadcrumb_region(nodes)
-        window_regions = self._detect_window_content_regions(nodes)
+    @staticmethod
+    def _is_window_side_name(tag: str, name: str, name_lower: str) -> bool:
+        # デスクトップアイコン候補のうち、実際はウィンドウ側 (CONTENT) とみなすもの
+        return bool(
+            _DESKTOP_TO_CONTENT_RE.search(name_lower)
+            or tag == "menu"
+            or name == "/"
+        )
+
+    def _forced_content_rects(
+        self, nodes: List[Node], w: int, h: int, bbox_map: Dict[int, Dict[str, int]]
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        サイドバー / パンくず / ウィンドウ / Software Center の各領域を検出し、
+        強制CONTENT領域として (min_x, max_x, min_y, max_y) の矩形リストで返す。
+        """
+        # ★name 別の索引 (タブ / Source / Go back の探索で全走査しない)
+        by_name = self._index_nodes(nodes, lambda n: n.get("name"))
+
+        sidebar_bbox = self._detect_sidebar_region(nodes, bbox_map)
+        breadcrumb_bbox = self._detect_breadcrumb_region(nodes, bbox_map)
+        window_regions = self._detect_window_content_regions(nodes, bbox_map)
 
         # ★追加: Software Center のヘッダー（タブ）領域を事前検出
         # これがあれば、その下の領域を強制的に CONTENT にする
         sw_center_content_bbox = None
         tab_keywords = {"Explore", "Installed", "Updates"}
-        sw_tabs = [n for n in nodes if (n.get("tag") == "radio-button" and n.get("name") in tab_keywords)]
+        sw_tabs = [n for n in self._pick_indexed(nodes, by_name, tab_keywords) if n.get("tag") == "radio-button"]
         
         if len(sw_tabs) >= 2:
             # タブの座標から、ウィンドウとおぼしき領域（特に下方向）を定義
-            txs = [node_bbox_from_raw(n)["x"] for n in sw_tabs]
-            tys = [node_bbox_from_raw(n)["y"] for n in sw_tabs]
+            txs = [bbox_map[id(n)]["x"] for n in sw_tabs]
+            tys = [bbox_map[id(n)]["y"] for n in sw_tabs]
             
             # 左右に大きく広げて、左端のSearchボタンや、右端のアプリ列もカバーする
             # タブのY座標より下はすべてコンテンツとみなす
@@ -330,12 +531,12 @@ class OSCompressor(BaseA11yCompressor):
         else:
             # ★修正: 詳細画面 (Details View) の検出強化
             # "Source" ボタン、または "Go back" ボタンを探す
-            header_anchor = next((n for n in nodes if n.get("name") == "Source" and n.get("tag") in {"menu-button", "combo-box", "push-button", "label"}), None)
+            header_anchor = next((n for n in self._pick_indexed(nodes, by_name, ("Source",)) if n.get("tag") in {"menu-button", "combo-box", "push-button", "label"}), None)
             if not header_anchor:
-                header_anchor = next((n for n in nodes if n.get("name") in {"Go back", "Back"} and n.get("tag") in {"push-button", "icon"}), None)
+                header_anchor = next((n for n in self._pick_indexed(nodes, by_name, ("Go back", "Back")) if n.get("tag") in {"push-button", "icon"}), None)
             
             if header_anchor:
-                sb = node_bbox_from_raw(header_anchor)
+                sb = bbox_map[id(header_anchor)]
                 if sb["y"] < 200:
                     sw_center_content_bbox = {
                         "min_x": 0,
@@ -344,22 +545,78 @@ class OSCompressor(BaseA11yCompressor):
                         "max_y": h
                     }
 
-        for n in nodes:
-            bbox = node_bbox_from_raw(n)
-            x, y, bw, bh = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
-            cx, cy = bbox_to_center_tuple(bbox)
+        # ★強制CONTENT領域をループ前に (min_x, max_x, min_y, max_y) の矩形リストへ平坦化しておく
+        #   (サイドバー → パンくず → ウィンドウ(±10) → Software Center の優先順)
+        forced_rects: List[Tuple[float, float, float, float]] = []
+        if sidebar_bbox:
+            forced_rects.append((
+                sidebar_bbox["x"], sidebar_bbox["x"] + sidebar_bbox["w"],
+                sidebar_bbox["y"], sidebar_bbox["y"] + sidebar_bbox["h"],
+            ))
+        if breadcrumb_bbox:
+            forced_rects.append((
+                breadcrumb_bbox["x"], breadcrumb_bbox["x"] + breadcrumb_bbox["w"],
+                breadcrumb_bbox["y"], breadcrumb_bbox["y"] + breadcrumb_bbox["h"],
+            ))
+        for wb in window_regions:
+            forced_rects.append((
+                wb["x"] - 10, wb["x"] + wb["w"] + 10,
+                wb["y"] - 10, wb["y"] + wb["h"] + 10,
+            ))
+        if sw_center_content_bbox:
+            # Software Center 領域は下方向に無制限
+            forced_rects.append((
+                sw_center_content_bbox["min_x"], sw_center_content_bbox["max_x"],
+                sw_center_content_bbox["min_y"], float("inf"),
+            ))
+        return forced_rects
+
+    def _compute_semantic_regions(
+        self, nodes: List[Node], w: int, h: int, static_only: bool = False
+    ) -> Dict[str, List[Node]]:
+        """
+        static_only=True のときは APP_LAUNCHER / TOP_BAR / DESKTOP_ICONS の判定だけを
+        保証し、それ以外のノードは (MODAL 以外) すべて CONTENT に入れる。
+        """
+        regions: Dict[str, List[Node]] = {
+            "APP_LAUNCHER": [],
+            "TOP_BAR": [],
+            "DESKTOP_ICONS": [],
+            "OS_POPUP": [],
+            "MODAL": [],
+            "CONTENT": [],
+        }
 
-            tag  = (n.get("tag") or "").lower()
+        LAUNCHER_X_LIMIT = w * 0.05
+        LAUNCHER_W_MAX   = w * 0.12
+        TOP_BAR_MAX_Y    = h * 0.04
+        POPUP_W_MAX      = w * 0.35
+        POPUP_H_MAX      = h * 0.25
+        
+        self._text_cache.clear()
+        text = self._text
+        # ★各ノードの bbox は一度だけパースし、以降の検出処理で使い回す
+        #   (メインループは列指向の座標表を直接読む)
+        soa = nodes_to_soa(nodes)
+        bbox_map = dict(zip(map(id, nodes), soa["bboxes"]))
+
+        # ★強制CONTENT領域の検出 (サイドバー / パンくず / ウィンドウ / Software Center) は
+        #   手順4 に到達するノードが現れた時点で初めて行う
+        forced_rects: Optional[List[Tuple[float, float, float, float]]] = None
+
+        for n, x, y, bw, bh, cx, cy in zip(
+            nodes, soa["xs"], soa["ys"], soa["ws"], soa["hs"], soa["cxs"], soa["cys"]
+        ):
+
+            tag, name, name_lower = text(n)
             role = (n.get("role") or "").lower()
-            name = (n.get("name") or n.get("text") or "").strip()
-            name_lower = name.lower()
 
             # 1. APP_LAUNCHER
             if (
                 x < LAUNCHER_X_LIMIT
                 and bh > 32
-                and bw < w * 0.12
-                and tag in {"push-button", "toggle-button", "launcher-app"}
+                and bw < LAUNCHER_W_MAX
+                and tag in _LAUNCHER_TAGS
                 and name
             ):
                 regions["APP_LAUNCHER"].append(n)
@@ -367,84 +624,48 @@ class OSCompressor(BaseA11yCompressor):
 
             # 2. TOP_BAR
             if cy < TOP_BAR_MAX_Y:
-                if tag in {
-                    "label", "push-button", "toggle-button", "menu",
-                    "image", "icon", "text",
-                }:
+                if tag in _TOPBAR_TAGS:
                     regions["TOP_BAR"].append(n)
                     continue
 
             # 3. MODAL
-            if role in {"dialog", "alert"} or any(
-                kw in name_lower for kw in getattr(self, "MODAL_KEYWORDS", [])
-            ):
+            if role in _MODAL_ROLES or self.MODAL_KEYWORDS_RE.search(name_lower):
                 regions["MODAL"].append(n)
                 continue
 
+            # ★static_only: デスクトップアイコンになり得ないノードは、この先の判定に
+            #   関係なく動的側なので強制CONTENT判定をせずに CONTENT へ送る
+            if static_only and (
+                not (tag in _DESKTOP_TAGS and name)
+                or self._is_window_side_name(tag, name, name_lower)
+                or self._is_popup_like(tag, name_lower, bw, bh, POPUP_W_MAX, POPUP_H_MAX)
+            ):
+                regions["CONTENT"].append(n)
+                continue
+
             # 4. 強制CONTENT領域 (ウィンドウBBox優先ルール)
-            is_forced_content = False
-            
-            # A. サイドバー
-            if sidebar_bbox:
-                if (sidebar_bbox["x"] <= cx <= sidebar_bbox["x"] + sidebar_bbox["w"]) and (sidebar_bbox["y"] <= cy <= sidebar_bbox["y"] + sidebar_bbox["h"]):
-                    is_forced_content = True
-            
-            # B. パンくずリスト
-            if not is_forced_content and breadcrumb_bbox:
-                if (breadcrumb_bbox["x"] <= cx <= breadcrumb_bbox["x"] + breadcrumb_bbox["w"]) and (breadcrumb_bbox["y"] <= cy <= breadcrumb_bbox["y"] + breadcrumb_bbox["h"]):
-                    is_forced_content = True
-            
-            # C. ウィンドウ領域 (通常)
-            if not is_forced_content and window_regions:
-                for wb in window_regions:
-                    if (wb["x"] - 10 <= cx <= wb["x"] + wb["w"] + 10) and \
-                       (wb["y"] - 10 <= cy <= wb["y"] + wb["h"] + 10):
-                        is_forced_content = True
-                        break
-            
-            # D. ★追加: Software Center 領域
-            if not is_forced_content and sw_center_content_bbox:
-                if (sw_center_content_bbox["min_x"] <= cx <= sw_center_content_bbox["max_x"]) and \
-                   (cy >= sw_center_content_bbox["min_y"]):
-                    is_forced_content = True
+            if forced_rects is None:
+                forced_rects = self._forced_content_rects(nodes, w, h, bbox_map)
+            is_forced_content = any(
+                x0 <= cx <= x1 and y0 <= cy <= y1
+                for x0, x1, y0, y1 in forced_rects
+            )
 
             if is_forced_content:
                 regions["CONTENT"].append(n)
                 continue
 
             # 5. OS_POPUP
-            if (
-                bw < w * 0.35
-                and bh < h * 0.25
-                and (
-                    tag in {"entry", "text", "textbox"}
-                    or "rename" in name_lower
-                    or "folder name" in name_lower
-                )
-            ):
+            if self._is_popup_like(tag, name_lower, bw, bh, POPUP_W_MAX, POPUP_H_MAX):
                 regions["OS_POPUP"].append(n)
                 continue
 
             # 6. DESKTOP_ICONS
             if (
-                tag in {"label", "icon", "image", "push-button"}
+                tag in _DESKTOP_TAGS
                 and name
             ):
-                lower = name_lower
-                if (
-                    "minimize" in lower
-                    or "maximize" in lower
-                    or "close" in lower
-                    or lower.startswith(("user@", "root@", "~"))
-                    or lower.endswith("$")
-                    or lower.endswith("#")
-                    or "@" in lower and ":" in lower
-                    or "/home/" in lower
-                    or "terminal" in lower
-                    or tag == "menu"
-                    or name == "/"
-                    or "software updates" in lower
-                ):
+                if self._is_window_side_name(tag, name, name_lower):
                     regions["CONTENT"].append(n)
                     continue
 
@@ -458,11 +679,18 @@ class OSCompressor(BaseA11yCompressor):
 
     # === 圧縮系ユーティリティ (共通) ===
 
-    def _format_center(self, n: Node) -> str:
-        bbox = node_bbox_from_raw(n)
-        cx, cy = bbox_to_center_tuple(bbox)
+    def _format_center(self, n: Node, center: Optional[Tuple[int, int]] = None) -> str:
+        # center: 計算済みの中心座標があれば渡して bbox の再パースを避ける
+        if center is None:
+            center = bbox_to_center_tuple(node_bbox_from_raw(n))
+        cx, cy = center
         return f"@ ({cx}, {cy})"
 
+    @staticmethod
+    def _centers_of(nodes: List[Node]) -> List[Tuple[int, int]]:
+        """nodes と同じ並びで中心座標を一度だけ計算する (ソートキー/座標表示で共用)。"""
+        return [bbox_to_center_tuple(node_bbox_from_raw(n)) for n in nodes]
+
     # === OS向け 各領域の圧縮ロジック ===
 
     def _compress_app_launcher(self, nodes: List[Node]) -> List[str]:
@@ -474,21 +702,18 @@ class OSCompressor(BaseA11yCompressor):
         lines: List[str] = []
 
         # y座標順に並べる
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[1]
-        )
-
-        seen_names: set[str] = set()
-        for n in sorted_nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
-            if not name:
-                continue
-            if name in seen_names:
-                continue
-            seen_names.add(name)
-
-            center_str = self._format_center(n)
+        centers = self._centers_of(nodes)
+        order = sorted(range(len(nodes)), key=lambda i: centers[i][1])
+
+        # ★名前ごとに最初の1件だけを残す (挿入順を保つ dict で dedup)
+        first_by_name: Dict[str, int] = {}
+        for i in order:
+            name = (nodes[i].get("name") or nodes[i].get("text") or "").strip()
+            if name:
+                first_by_name.setdefault(name, i)
+
+        for name, i in first_by_name.items():
+            center_str = self._format_center(nodes[i], centers[i])
             lines.append(f"[launcher-app] \"{name}\" {center_str}")
 
         return lines
@@ -501,20 +726,19 @@ class OSCompressor(BaseA11yCompressor):
         lines: List[str] = []
 
         # 左→右に並べたいので x でソート
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[0]
-        )
+        centers = self._centers_of(nodes)
+        order = sorted(range(len(nodes)), key=lambda i: centers[i][0])
 
         seen: set[str] = set()
 
-        for n in sorted_nodes:
+        for i in order:
+            n = nodes[i]
             name = (n.get("name") or n.get("text") or "").strip()
             if not name:
                 continue
 
             lower = name.lower()
-            center_str = self._format_center(n)
+            center_str = self._format_center(n, centers[i])
 
             # 種別ごとの簡単な分類
             if "activities" in lower:
@@ -550,22 +774,18 @@ class OSCompressor(BaseA11yCompressor):
         """
         lines: List[str] = []
 
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[1:]  # (y, x)
-        )
-
-        seen_names: set[str] = set()
+        centers = self._centers_of(nodes)
+        order = sorted(range(len(nodes)), key=lambda i: centers[i][1:])  # (y, x)
 
-        for n in sorted_nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
-            if not name:
-                continue
-            if name in seen_names:
-                continue
-            seen_names.add(name)
+        # ★名前ごとに最初の1件だけを残す (挿入順を保つ dict で dedup)
+        first_by_name: Dict[str, int] = {}
+        for i in order:
+            name = (nodes[i].get("name") or nodes[i].get("text") or "").strip()
+            if name:
+                first_by_name.setdefault(name, i)
 
-            center_str = self._format_center(n)
+        for name, i in first_by_name.items():
+            center_str = self._format_center(nodes[i], centers[i])
             lines.append(f"[desktop-icon] \"{name}\" {center_str}")
 
         return lines
@@ -581,11 +801,10 @@ class OSCompressor(BaseA11yCompressor):
         lines: List[str] = []
 
         for n in nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
+            tag, name, _ = self._text(n)
             if not name:
                 continue
 
-            tag = (n.get("tag") or "").lower()
             center_str = self._format_center(n)
 
             if tag in {"entry", "textbox", "text"}:
@@ -608,47 +827,63 @@ class OSCompressor(BaseA11yCompressor):
 
     # === ★新規: ウィンドウ検出 & コンテンツ/モーダル振り分けロジック ===
 
-    def _detect_and_classify_nodes(self, all_nodes: List[Node]) -> Tuple[List[str], List[Node]]:
+    def _detect_and_classify_nodes(
+        self, all_nodes: List[Node], screen_w: int = 1920, screen_h: int = 1080
+    ) -> Tuple[List[str], List[Node]]:
         """
         全ノードを対象にウィンドウ検知を行う。
         ★修正: 本物のモーダル（暗転あり・キーワード一致）を最優先で検出し、ウィンドウへの吸収を防ぐ。
         """
         if not all_nodes: return [], []
         
+        self._text_cache.clear()
         remaining_nodes = list(all_nodes)
         detected_windows = []
         true_modal_nodes = [] # 確定モーダルリスト
         used_ids = set()
 
+        # ★name / tag 別の索引を一度だけ作り、各セクションの候補抽出に使う
+        by_name = self._index_nodes(remaining_nodes, lambda n: n.get("name"))
+        by_tag = self._index_nodes(remaining_nodes, lambda n: self._text(n)[0])
+        # ターミナルは Close ボタンごと / フォールバックで何度も引くので一度だけ取り出す
+        all_terminals = self._pick_indexed(remaining_nodes, by_tag, ("terminal",))
+
         # --- 0. ★新規: 明らかなモーダルを先行抽出 ---
         # 暗転レイヤー検出
-        bboxes = [node_bbox_from_raw(n) for n in remaining_nodes]
-        screen_area = 1920 * 1080 # 仮
+        # ★座標は列指向の表から面積だけを読む。画面面積は実際の画面サイズを使う
+        soa = nodes_to_soa(remaining_nodes)
+        # ★bbox は id(n) -> bbox で共有し、以降のセクションでは再パースしない
+        bbox_cache: Dict[int, Dict[str, int]] = dict(zip(map(id, remaining_nodes), soa["bboxes"]))
+        screen_area = max(screen_w * screen_h, 1)
         dim_layer = None
         
-        for n in remaining_nodes:
-            b = node_bbox_from_raw(n)
+        for n, bw, bh in zip(remaining_nodes, soa["ws"], soa["hs"]):
             # 画面の30%以上覆うテキスト無しのパネル
-            if (b["w"]*b["h"])/screen_area > 0.3 and len((n.get("text") or n.get("name") or "").strip()) < 3:
-                tag = (n.get("tag") or "").lower()
-                if tag in {"panel", "frame", "image", "static", "text"}:
+            if (bw*bh)/screen_area > 0.3 and len((n.get("text") or n.get("name") or "").strip()) < 3:
+                if self._text(n)[0] in _DIM_LAYER_TAGS:
                     dim_layer = n
                     break
         
         if dim_layer:
-            dim_box = node_bbox_from_raw(dim_layer)
+            dim_box = bbox_cache[id(dim_layer)]
             # 暗転レイヤーの上に乗っている（z-orderは不明だが包含関係やキーワードで推測）要素を探す
             # 特に「Authentication」「Password」などのキーワードを持つ小さな領域
             potential_modal_nodes = []
             has_modal_keyword = False
+            triggers = [] # 強いキーワードを name に持つノード (走査を1回で済ませる)
             
             for n in remaining_nodes:
+                is_trigger = self.MODAL_KEYWORDS_RE.search((n.get("name") or "").lower()) is not None
+                if is_trigger:
+                    triggers.append(n)
                 if n == dim_layer: continue
                 # 暗転レイヤーの範囲内にあるか？（全画面暗転なら全部入るが...）
                 
-                # キーワードチェック
-                name = (n.get("name") or n.get("text") or "").strip().lower()
-                if any(k in name for k in self.MODAL_KEYWORDS):
+                # キーワードチェック (name が空なら text を見る)
+                if is_trigger or (
+                    not n.get("name")
+                    and self.MODAL_KEYWORDS_RE.search((n.get("text") or "").lower())
+                ):
                     has_modal_keyword = True
                 
                 # モーダル構成要素っぽいタグ
@@ -663,58 +898,78 @@ class OSCompressor(BaseA11yCompressor):
             
             # 中心点付近のクラスタリング
             if has_modal_keyword:
-                # 強いキーワードを持つノードを探す
-                triggers = [n for n in remaining_nodes if any(k in (n.get("name") or "").lower() for k in self.MODAL_KEYWORDS)]
+                # 強いキーワードを持つノード (triggers) は上のループで回収済み
                 if triggers:
                     # 最初のトリガーを中心に、一定距離内のノードをモーダルとして回収
-                    ref_box = node_bbox_from_raw(triggers[0])
+                    ref_box = bbox_cache[id(triggers[0])]
                     ref_cx, ref_cy = ref_box["x"]+ref_box["w"]/2, ref_box["y"]+ref_box["h"]/2
                     
-                    for n in remaining_nodes:
-                        nb = node_bbox_from_raw(n)
-                        ncx, ncy = nb["x"]+nb["w"]/2, nb["y"]+nb["h"]/2
+                    # ★座標は手順0で作った列指向の表から読み、範囲判定を内包表記1回で済ませる
+                    near = [
+                        n for n, nx, ny, nw, nh in zip(remaining_nodes, soa["xs"], soa["ys"], soa["ws"], soa["hs"])
                         # 距離500px以内ならモーダルの仲間とみなす
-                        if abs(ncx - ref_cx) < 500 and abs(ncy - ref_cy) < 400:
-                            true_modal_nodes.append(n)
-                            used_ids.add(id(n))
+                        if abs(nx + nw/2 - ref_cx) < 500 and abs(ny + nh/2 - ref_cy) < 400
+                    ]
+                    true_modal_nodes.extend(near)
+                    used_ids.update(map(id, near))
                     
                     # 暗転レイヤー自体は背景扱いでもいいが、モーダルの一部としてもよい
                     # ここでは除外済み扱いにする
                     used_ids.add(id(dim_layer))
 
+        # ★未使用ノードだけの走査用リスト。各セクションで消費したら詰め直し、
+        #   全ノードの再走査を避ける (索引の位置は remaining_nodes 基準のまま)
+        remaining = [n for n in remaining_nodes if id(n) not in used_ids]
+
         # --- 1. サイドバー領域検出 (補正用) ---
-        sidebar_bbox = self._detect_sidebar_region(all_nodes)
+        sidebar_bbox = self._detect_sidebar_region(all_nodes, bbox_cache)
+
+        # ★ウィンドウタイトル候補 (名前付き label) を中心Y順に並べておき、
+        #   「ボタンと同じ行で左側にある最も近いラベル」の探索を bisect で行に絞る
+        title_labels = []
+        for i, n in enumerate(remaining_nodes):
+            tag, name, _ = self._text(n)
+            if tag == "label" and name:
+                b = bbox_cache[id(n)]
+                title_labels.append((b["y"] + b["h"]/2, i, n, b))
+        title_labels.sort(key=lambda t: (t[0], t[1]))
+        title_cys = [t[0] for t in title_labels]
+
+        def nearest_left_title(ref_cy: float, band: float, ref_x: int, skip_used: bool) -> Optional[Node]:
+            # |cy - ref_cy| <= band かつ ref_x より左にあるラベルのうち、右端が最も近いもの
+            # (同距離なら元の並び順で先のもの)
+            best, best_key = None, None
+            lo = bisect_left(title_cys, ref_cy - band)
+            hi = bisect_right(title_cys, ref_cy + band)
+            for _, i, n, n_box in title_labels[lo:hi]:
+                if skip_used and id(n) in used_ids: continue
+                if n_box["x"] >= ref_x: continue
+                key = (ref_x - (n_box["x"] + n_box["w"]), i)
+                if best_key is None or key < best_key: best_key, best = key, n
+            return best
 
         # --- 2. Closeボタンを持つウィンドウ検出 ---
-        close_buttons = [n for n in remaining_nodes if (n.get("tag") in {"push-button", "toggle-button"} and n.get("name") == "Close")]
+        close_buttons = [n for n in self._pick_indexed(remaining_nodes, by_name, ("Close",)) if n.get("tag") in {"push-button", "toggle-button"}]
         
         for close_btn in close_buttons:
             if id(close_btn) in used_ids: continue
-            c_box = node_bbox_from_raw(close_btn)
+            c_box = bbox_cache[id(close_btn)]
             c_cy, c_right = c_box["y"] + c_box["h"]/2, c_box["x"] + c_box["w"]
             
-            best_title, min_dist = None, float("inf")
-            for n in remaining_nodes:
-                if n == close_btn: continue
-                n_box = node_bbox_from_raw(n)
-                if abs((n_box["y"]+n_box["h"]/2) - c_cy) > 20 or n_box["x"] >= c_box["x"]: continue
-                tag, name = (n.get("tag") or "").lower(), (n.get("name") or n.get("text") or "").strip()
-                if tag == "label" and name:
-                    dist = c_box["x"] - (n_box["x"] + n_box["w"])
-                    if dist < min_dist: min_dist, best_title = dist, n
+            best_title = nearest_left_title(c_cy, 20, c_box["x"], skip_used=False)
 
             header_nodes = [close_btn]
             if best_title: header_nodes.append(best_title)
             
             # 周辺ボタン回収
-            for n in remaining_nodes:
+            for n in remaining:
                 if id(n) in used_ids or n in header_nodes: continue
-                n_box = node_bbox_from_raw(n)
+                n_box = bbox_cache[id(n)]
                 if abs((n_box["y"]+n_box["h"]/2) - c_cy) <= 15 and n_box["x"] < c_right and n_box["x"] > (c_box["x"] - 600):
-                    if (n.get("tag") or "").lower() in {"push-button", "toggle-button", "label", "icon"}:
+                    if self._text(n)[0] in {"push-button", "toggle-button", "label", "icon"}:
                         header_nodes.append(n)
 
-            min_x = min(node_bbox_from_raw(n)["x"] for n in header_nodes)
+            min_x = min(bbox_cache[id(n)]["x"] for n in header_nodes)
             
             # サイドバーによる左端拡張
             if sidebar_bbox:
@@ -723,9 +978,9 @@ class OSCompressor(BaseA11yCompressor):
 
             # ターミナルBody早期回収
             content_nodes = []
-            terminals = [n for n in remaining_nodes if (n.get("tag") or "").lower() == "terminal" and id(n) not in used_ids]
+            terminals = [n for n in all_terminals if id(n) not in used_ids]
             for term in terminals:
-                t_box = node_bbox_from_raw(term)
+                t_box = bbox_cache[id(term)]
                 if t_box["y"] >= c_box["y"] and t_box["y"] < (c_box["y"] + 200) and t_box["x"] < c_right and (t_box["x"] + t_box["w"]) > min_x:
                      content_nodes.append(term); used_ids.add(id(term))
 
@@ -738,42 +993,44 @@ class OSCompressor(BaseA11yCompressor):
                 "header_y": c_box["y"], "header_bottom": c_box["y"] + c_box["h"],
                 "header_nodes": header_nodes, "content_nodes": content_nodes
             })
+            remaining = [n for n in remaining if id(n) not in used_ids]
 
         # --- 3. Menuボタンx3 パターン ---
-        menu_buttons = [n for n in remaining_nodes if (n.get("tag") in {"push-button", "toggle-button"} and n.get("name") == "Menu") and id(n) not in used_ids]
+        menu_buttons = [n for n in self._pick_indexed(remaining_nodes, by_name, ("Menu",)) if n.get("tag") in {"push-button", "toggle-button"} and id(n) not in used_ids]
         menu_rows, processed_menus = [], set()
-        for btn in menu_buttons:
+        # ★中心Y順に並べ、基準ボタンから ±10px 未満のボタンだけを bisect で取り出す
+        menu_cys = []
+        for i, btn in enumerate(menu_buttons):
+            b = bbox_cache[id(btn)]
+            menu_cys.append((b["y"] + b["h"]/2, i))
+        menu_cys.sort()
+        menu_cy_keys = [cy for cy, _ in menu_cys]
+        for i, btn in enumerate(menu_buttons):
             if id(btn) in processed_menus: continue
             row = [btn]; processed_menus.add(id(btn))
-            base_cy = node_bbox_from_raw(btn)["y"] + node_bbox_from_raw(btn)["h"]/2
-            for other in menu_buttons:
+            base_cy = bbox_cache[id(btn)]["y"] + bbox_cache[id(btn)]["h"]/2
+            lo = bisect_right(menu_cy_keys, base_cy - 10)
+            hi = bisect_left(menu_cy_keys, base_cy + 10)
+            for j in sorted(j for _, j in menu_cys[lo:hi]):
+                other = menu_buttons[j]
                 if id(other) in processed_menus: continue
-                if abs((node_bbox_from_raw(other)["y"]+node_bbox_from_raw(other)["h"]/2) - base_cy) < 10:
-                    row.append(other); processed_menus.add(id(other))
+                row.append(other); processed_menus.add(id(other))
             menu_rows.append(row)
 
         for row in menu_rows:
             if len(row) >= 3:
-                row.sort(key=lambda n: node_bbox_from_raw(n)["x"])
+                row.sort(key=lambda n: bbox_cache[id(n)]["x"])
                 rightmost = row[-1]
-                r_box = node_bbox_from_raw(rightmost)
+                r_box = bbox_cache[id(rightmost)]
                 limit_max = r_box["x"] + r_box["w"]
                 
-                l_cy = node_bbox_from_raw(row[0])["y"] + node_bbox_from_raw(row[0])["h"]/2
-                l_x = node_bbox_from_raw(row[0])["x"]
-                best_title, min_dist = None, float("inf")
-                for n in remaining_nodes:
-                    if id(n) in used_ids or n in row: continue
-                    n_box = node_bbox_from_raw(n)
-                    if abs((n_box["y"]+n_box["h"]/2) - l_cy) > 15 or n_box["x"] >= l_x: continue
-                    tag, name = (n.get("tag") or "").lower(), (n.get("name") or n.get("text") or "").strip()
-                    if tag == "label" and name:
-                        dist = l_x - (n_box["x"] + n_box["w"])
-                        if dist < min_dist: min_dist, best_title = dist, n
+                l_cy = bbox_cache[id(row[0])]["y"] + bbox_cache[id(row[0])]["h"]/2
+                l_x = bbox_cache[id(row[0])]["x"]
+                best_title = nearest_left_title(l_cy, 15, l_x, skip_used=True)
                 
                 header_nodes = row
                 if best_title: header_nodes = [best_title] + header_nodes
-                min_x = min(node_bbox_from_raw(n)["x"] for n in header_nodes)
+                min_x = min(bbox_cache[id(n)]["x"] for n in header_nodes)
                 
                 if sidebar_bbox and abs(r_box["y"] - sidebar_bbox["y"]) < 100 and min_x > sidebar_bbox["x"]:
                      min_x = sidebar_bbox["x"]
@@ -785,27 +1042,28 @@ class OSCompressor(BaseA11yCompressor):
                     "header_y": r_box["y"], "header_bottom": r_box["y"] + r_box["h"],
                     "header_nodes": header_nodes, "content_nodes": []
                 })
+        remaining = [n for n in remaining if id(n) not in used_ids]
+
         # --- 3.5 Software Center (Tabbed Interface) ---
         # ★新規追加: "Explore", "Installed", "Updates" のラジオボタン列をヘッダーとする
         tab_keywords = {"Explore", "Installed", "Updates"}
-        sw_tabs = [n for n in remaining_nodes if (n.get("tag") == "radio-button" and n.get("name") in tab_keywords) and id(n) not in used_ids]
+        sw_tabs = [n for n in self._pick_indexed(remaining_nodes, by_name, tab_keywords) if n.get("tag") == "radio-button" and id(n) not in used_ids]
         
         if len(sw_tabs) >= 2:
-             sw_tabs.sort(key=lambda n: node_bbox_from_raw(n)["x"])
+             sw_tabs.sort(key=lambda n: bbox_cache[id(n)]["x"])
              header_nodes = list(sw_tabs)
-             min_x = node_bbox_from_raw(sw_tabs[0])["x"]
-             max_x = node_bbox_from_raw(sw_tabs[-1])["x"] + node_bbox_from_raw(sw_tabs[-1])["w"]
-             header_y = node_bbox_from_raw(sw_tabs[0])["y"]
-             header_bottom = header_y + node_bbox_from_raw(sw_tabs[0])["h"]
+             min_x = bbox_cache[id(sw_tabs[0])]["x"]
+             max_x = bbox_cache[id(sw_tabs[-1])]["x"] + bbox_cache[id(sw_tabs[-1])]["w"]
+             header_y = bbox_cache[id(sw_tabs[0])]["y"]
+             header_bottom = header_y + bbox_cache[id(sw_tabs[0])]["h"]
              
              # 左側にあるSearchボタン(toggle-button)もヘッダーに含める
-             for n in remaining_nodes:
+             for n in self._pick_indexed(remaining_nodes, by_name, ("Search",)):
                  if id(n) in used_ids: continue
-                 if n.get("name") == "Search":
-                     b = node_bbox_from_raw(n)
-                     if abs(b["y"] - header_y) < 20 and b["x"] < min_x:
-                         header_nodes.append(n)
-                         min_x = min(min_x, b["x"])
+                 b = bbox_cache[id(n)]
+                 if abs(b["y"] - header_y) < 20 and b["x"] < min_x:
+                     header_nodes.append(n)
+                     min_x = min(min_x, b["x"])
              
              for hn in header_nodes: used_ids.add(id(hn))
              
@@ -815,17 +1073,18 @@ class OSCompressor(BaseA11yCompressor):
                 "header_y": header_y, "header_bottom": header_bottom,
                 "header_nodes": header_nodes, "content_nodes": []
             })
+             remaining = [n for n in remaining if id(n) not in used_ids]
 
         # --- 3.6 Software Center (Details Interface) ---
         # ★追加: 詳細画面の検出ロジック
         # "Source" ボタン、または "Go back" ボタンを探してヘッダーの基準にする
-        header_anchor = next((n for n in remaining_nodes if n.get("name") == "Source" and id(n) not in used_ids), None)
+        header_anchor = next((n for n in self._pick_indexed(remaining_nodes, by_name, ("Source",)) if id(n) not in used_ids), None)
         
         if not header_anchor:
-             header_anchor = next((n for n in remaining_nodes if n.get("name") in {"Go back", "Back"} and id(n) not in used_ids), None)
+             header_anchor = next((n for n in self._pick_indexed(remaining_nodes, by_name, ("Go back", "Back")) if id(n) not in used_ids), None)
 
         if header_anchor:
-             sb = node_bbox_from_raw(header_anchor)
+             sb = bbox_cache[id(header_anchor)]
              # 画面上部にあるかチェック
              if sb["y"] < 200:
                  header_nodes = [header_anchor]
@@ -833,9 +1092,9 @@ class OSCompressor(BaseA11yCompressor):
                  header_bottom = header_y + sb["h"]
                  
                  # 同じ高さにある他のヘッダー要素（検索アイコンなど）を回収
-                 for n in remaining_nodes:
+                 for n in remaining:
                      if id(n) in used_ids or n in header_nodes: continue
-                     nb = node_bbox_from_raw(n)
+                     nb = bbox_cache[id(n)]
                      if abs(nb["y"] - header_y) < 20:
                          header_nodes.append(n)
 
@@ -853,41 +1112,32 @@ class OSCompressor(BaseA11yCompressor):
                 })
 
         # --- 4. ターミナルフォールバック ---
-        terminals = [n for n in remaining_nodes if (n.get("tag") or "").lower() == "terminal" and id(n) not in used_ids]
+        terminals = [n for n in all_terminals if id(n) not in used_ids]
+        # ★既にどこかのウィンドウの content に入っているノード id (ターミナルごとの再構築を避ける)
+        covered_ids = {id(c) for w in detected_windows for c in w["content_nodes"]}
         for term in terminals:
-            t_box = node_bbox_from_raw(term)
-            is_covered = False
-            for w in detected_windows:
-                if id(term) in [id(c) for c in w["content_nodes"]]: is_covered = True
-            if is_covered: continue
+            t_box = bbox_cache[id(term)]
+            if id(term) in covered_ids: continue
             detected_windows.append({
                 "title": "Terminal", "limit_max_x": t_box["x"] + t_box["w"], "limit_min_x": t_box["x"],
                 "header_y": t_box["y"] - 40, "header_bottom": t_box["y"],
                 "header_nodes": [], "content_nodes": [term]
             })
+            covered_ids.add(id(term))
             used_ids.add(id(term))
 
         # --- 5. ノード振り分け (垂直距離優先) ---
+        remaining = [n for n in remaining if id(n) not in used_ids]
+        # ★採点はモジュール関数 _assign_to_windows にまとめ、座標はタプルで一括で渡す
+        #   (ウィンドウは x 方向のビンで絞り込まれる)
+        centers = [
+            (b["x"] + b["w"]/2, b["y"] + b["h"]/2)
+            for b in map(bbox_cache.__getitem__, map(id, remaining))
+        ]
+        win_limits = [(w["limit_min_x"], w["limit_max_x"], w["header_bottom"]) for w in detected_windows]
         orphans = []
-        for n in remaining_nodes:
-            if id(n) in used_ids: continue
-            n_box = node_bbox_from_raw(n)
-            n_cx, n_cy = n_box["x"] + n_box["w"]/2, n_box["y"] + n_box["h"]/2
-            
-            best_window, min_score = None, float("inf")
-            for w in detected_windows:
-                if n_cx > w["limit_max_x"] + 50: continue
-                if n_cx < w["limit_min_x"] - 50: continue
-                dy = n_cy - w["header_bottom"]
-                if dy < -10: continue 
-                
-                horizontal_pen = 0
-                if n_cx < w["limit_min_x"]: horizontal_pen = w["limit_min_x"] - n_cx
-                elif n_cx > w["limit_max_x"]: horizontal_pen = n_cx - w["limit_max_x"]
-                score = dy + (horizontal_pen * 5.0)
-                if score < min_score: min_score, best_window = score, w
-            
-            if best_window: best_window["content_nodes"].append(n)
+        for n, wi in zip(remaining, _assign_to_windows(centers, win_limits)):
+            if wi >= 0: detected_windows[wi]["content_nodes"].append(n)
             else: orphans.append(n)
 
         # --- 6. Orphans を モーダル判定 ---
@@ -899,25 +1149,21 @@ class OSCompressor(BaseA11yCompressor):
         # (ここでは簡易的に、以前の_filter_modal_nodesのロジックの一部を適用)
         if orphans:
              # 暗転レイヤー検出
-             bboxes = [node_bbox_from_raw(n) for n in orphans]
+             #   ★面積しきい値は 1920x1080 で 500000px² (約24%)。実際の画面面積 (手順0の screen_area)
+             #   に比例させ、整数のまま比較する。外接矩形は判定に使わないので求めない
+             bboxes = [bbox_cache[id(n)] for n in orphans]
              has_dim = False
-             screen_area = 1920 * 1080 # 仮
              if bboxes:
-                 min_x, min_y = min(b["x"] for b in bboxes), min(b["y"] for b in bboxes)
-                 max_x, max_y = max(b["x"]+b["w"] for b in bboxes), max(b["y"]+b["h"] for b in bboxes)
-                 union_area = (max_x - min_x) * (max_y - min_y)
-                 
-                 for n in orphans:
-                     b = node_bbox_from_raw(n)
-                     if (b["w"]*b["h"]) > 500000 and len((n.get("text") or "").strip()) < 3: # 大まかな判定
-                          has_dim = True
+                 for n, b in zip(orphans, bboxes):
+                     if (b["w"]*b["h"]) * _REF_SCREEN_AREA > _ORPHAN_DIM_AREA * screen_area and len((n.get("text") or "").strip()) < 3: # 大まかな判定
+                          has_dim = True; break
 
                  # 判定: 暗転がある、もしくはボタン+ラベルの小規模な集合ならモーダル
                  # Settingsの変更などは「ラベルだけ」なので、ここには来ない(ウィンドウに吸収済み)
                  # 万が一吸収されなかったラベル群は、CONTENT(Background)に落とすのが安全
                  
                  # ここでは「明らかにモーダル」な条件を厳しめにする
-                 is_likely_modal = has_dim or any((n.get("role")=="dialog") for n in orphans)
+                 is_likely_modal = has_dim or any(n.get("role") == "dialog" for n in orphans)
                  
                  if is_likely_modal:
                      true_modal_nodes = orphans
@@ -926,47 +1172,58 @@ class OSCompressor(BaseA11yCompressor):
 
         # --- 7. 出力テキスト生成 ---
         content_lines = []
-        detected_windows.sort(key=lambda w: (w["header_y"], w["limit_min_x"]))
+        detected_windows.sort(key=itemgetter("header_y", "limit_min_x"))
         for w in detected_windows:
             all_nodes = w["header_nodes"] + w["content_nodes"]
             if not all_nodes: continue
             content_lines.append(f"=== Window: {w['title']} ===")
-            content_lines.extend(self._format_node_list(all_nodes))
+            self._format_node_list(all_nodes, bbox_cache, out=content_lines)
             content_lines.append("")
         
         if background_orphans:
             if detected_windows: content_lines.append("=== Background / Other ===")
-            content_lines.extend(self._format_node_list(background_orphans))
+            self._format_node_list(background_orphans, bbox_cache, out=content_lines)
 
         return content_lines, true_modal_nodes
 
 
 
-    def _format_node_list(self, nodes: List[Node]) -> List[str]:
+    def _format_node_list(
+        self,
+        nodes: List[Node],
+        bbox_cache: Optional[Dict[int, Dict[str, int]]] = None,
+        out: Optional[List[str]] = None,
+    ) -> List[str]:
         """
         ノードリストをフォーマットして文字列リストにするヘルパー
+        bbox_cache: id(n) -> bbox の計算済み表 (無ければここで作る)
+        out: 指定すると中間リストを作らずその末尾へ直接書き出し、out を返す
         """
-        lines = []
+        lines = [] if out is None else out
+        if bbox_cache is None:
+            bbox_cache = {id(n): node_bbox_from_raw(n) for n in nodes}
+        # ★中心座標はノードごとに一度だけ求め、ソートと座標表示の両方で使う
+        centers = {id(n): bbox_to_center_tuple(bbox_cache[id(n)]) for n in nodes}
         # (y, x) 順にソート
         sorted_nodes = sorted(
             nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[1:]
+            key=lambda n: centers[id(n)][1:]
         )
         
-        seen_keys = set()
+        seen_keys: Set[Tuple[str, str]] = set()
 
         for n in sorted_nodes:
-            name = (n.get("name") or n.get("text") or "").strip()
             # ターミナルの場合、内容が空でも存在を示す
-            tag = (n.get("tag") or "").lower()
+            tag, name, _ = self._text(n)
             
             if not name and tag != "terminal":
                 continue
 
-            center_str = self._format_center(n)
+            center_str = self._format_center(n, centers[id(n)])
             
             # 重複排除
-            dedup_key = f"{name}|{center_str}"
+            #   (center_str に "|" は含まれないので、旧 "name|center" 文字列キーと同じ判定)
+            dedup_key = (name, center_str)
             if dedup_key in seen_keys:
                 continue
             seen_keys.add(dedup_key)
@@ -977,18 +1234,7 @@ class OSCompressor(BaseA11yCompressor):
                 lines.append(f"[terminal] \"{summary}\" {center_str}")
                 continue
             
-            if tag in {"push-button", "toggle-button"}:
-                prefix = "[btn]"
-            elif tag in {"check-box", "radio-button"}:
-                prefix = "[check]"
-            elif tag in {"entry", "text", "password-text"}:
-                prefix = "[input]"
-            elif tag in {"combo-box", "menu-button"}:
-                prefix = "[combo]"
-            elif tag in {"spin-button", "slider", "scroll-bar"}:
-                prefix = "[control]"
-            else:
-                prefix = "[text]"
+            prefix = _TAG_PREFIX.get(tag, "[text]")
 
             lines.append(f"{prefix} \"{name}\" {center_str}")
             
@@ -1006,38 +1252,39 @@ class OSCompressor(BaseA11yCompressor):
         これによりターミナル等の新規ウィンドウはモーダルから除外される。
         """
         if not modal_nodes: return []
+        self._text_cache.clear()
         
         # 1. 許可リスト除外 (Terminalなどはウィンドウ扱い)
-        IGNORE_TAGS = {"terminal", "application", "window", "frame"}
-        IGNORE_ROLES = {"application", "window", "frame"}
-        for n in modal_nodes:
-            if (n.get("tag") or "").lower() in IGNORE_TAGS or (n.get("role") or "").lower() in IGNORE_ROLES:
-                return []
-        
         # 2. ボタン構造判定 (Minimize/Maximizeがあれば通常ウィンドウ扱い)
-        WINDOW_CTRL_NAMES = {"minimize", "maximize"}
+        #   ★どちらも該当すれば即 [] なので1回の走査でまとめて判定する
         for n in modal_nodes:
-            name = (n.get("name") or "").strip().lower()
-            if name in WINDOW_CTRL_NAMES:
+            if (
+                self._text(n)[0] in _MODAL_IGNORE_TAGS
+                or (n.get("role") or "").lower() in _MODAL_IGNORE_ROLES
+                or (n.get("name") or "").strip().lower() in _WINDOW_CTRL_NAMES
+            ):
                 return []
 
         # 3. 暗転レイヤー検出 (画面の30%以上を覆うテキスト無しのパネル)
         screen_area = max(screen_w * screen_h, 1)
         has_dim = False
-        bboxes = [node_bbox_from_raw(n) for n in modal_nodes]
-        
-        min_x = min(b["x"] for b in bboxes)
-        min_y = min(b["y"] for b in bboxes)
-        max_x = max(b["x"]+b["w"] for b in bboxes)
-        max_y = max(b["y"]+b["h"] for b in bboxes)
-        union_area = (max_x - min_x) * (max_y - min_y)
-        
+        # ★外接矩形と暗転判定を1回の走査で済ませる。暗転があれば外接矩形によらず
+        #   モーダル確定なので、その時点で抜ける
+        min_x = min_y = float("inf")
+        max_x = max_y = float("-inf")
         for n in modal_nodes:
             b = node_bbox_from_raw(n)
-            if (b["w"]*b["h"])/screen_area > 0.3 and len((n.get("text") or n.get("name") or "").strip()) < 3:
-                tag = (n.get("tag") or "").lower()
-                if tag in {"panel", "frame", "image", "static", "text"}:
+            bx, by, bw, bh = b["x"], b["y"], b["w"], b["h"]
+            if (bw*bh)/screen_area > 0.3 and len((n.get("text") or n.get("name") or "").strip()) < 3:
+                if self._text(n)[0] in _DIM_LAYER_TAGS:
                     has_dim = True; break
+            if bx < min_x: min_x = bx
+            if by < min_y: min_y = by
+            if bx + bw > max_x: max_x = bx + bw
+            if by + bh > max_y: max_y = by + bh
+        if has_dim:
+            return modal_nodes
+        union_area = (max_x - min_x) * (max_y - min_y)
         
         # 4. 判定
         # 画面の40%以上を占める「大物」で、かつ暗転レイヤーがない場合は、ただの新規ウィンドウとみなす
@@ -1065,11 +1312,15 @@ class OSCompressor(BaseA11yCompressor):
         if r := self._compress_os_popup(regions.get("OS_POPUP", [])): lines.append("OS_POPUP:"); lines.extend(r)
 
         # ★統合処理: CONTENTとDiffモーダルを混ぜて、ウィンドウ検出で再分類
-        all_dynamic_nodes = regions.get("CONTENT", []) + (modal_nodes or [])
-        # 重複ID排除 (念のため)
-        unique_nodes = {id(n): n for n in all_dynamic_nodes}.values()
+        # 重複ID排除 (念のため) — 連結リストを作らず、初出順に1回の走査で拾う
+        seen_ids: Set[int] = set()
+        unique_nodes: List[Node] = []
+        for nodes in (regions.get("CONTENT", []), modal_nodes or []):
+            for n in nodes:
+                if id(n) in seen_ids: continue
+                seen_ids.add(id(n)); unique_nodes.append(n)
         
-        content_lines, true_modals = self._detect_and_classify_nodes(list(unique_nodes))
+        content_lines, true_modals = self._detect_and_classify_nodes(unique_nodes, screen_w, screen_h)
         
         if content_lines:
             lines.append("CONTENT:")
@@ -1077,6 +1328,7 @@ class OSCompressor(BaseA11yCompressor):
             
         if true_modals:
              lines.append("MODAL:")
-             lines.extend(self._format_node_list(true_modals))
+             self._format_node_list(true_modals, out=lines)
 
+        self._text_cache.clear()
         return lines
@@ -1,13 +1,18 @@
 import re
 import sys
-from typing import List, Dict, Tuple, Set, Optional, Any
+from itertools import chain, islice
+from operator import itemgetter, le
+from typing import List, Dict, Tuple, Set, FrozenSet, Optional, Any, Sequence
 from collections import defaultdict
 from ..core.engine import BaseA11yCompressor
 from ..core.common_ops import (
-    Node, node_bbox_from_raw, bbox_to_center_tuple,
+    Node, node_bbox_from_raw, bbox_to_center_tuple, nodes_to_soa,
     build_hierarchical_content_lines
 )
 
+# ★1行 [tag] "name" @ (cx, cy) を決める値の組（重複判定用）
+LineKey = Tuple[str, str, Tuple[int, int]]
+
 class ThunderbirdCompressor(BaseA11yCompressor):
     domain_name = "thunderbird"
     
@@ -15,13 +20,13 @@ class ThunderbirdCompressor(BaseA11yCompressor):
     use_statusbar = True 
 
     # モーダル判定用キーワード
-    MODAL_KEYWORDS: Set[str] = {
+    MODAL_KEYWORDS: FrozenSet[str] = frozenset({
         "save as", "print", "password", 
         "alert", "confirm"
-    }
+    })
     
     # Home画面(Dashboard)特有のキーワード
-    DASHBOARD_KEYWORDS: Set[str] = {
+    DASHBOARD_KEYWORDS: FrozenSet[str] = frozenset({
     "read messages", "write a new message", "search messages",
     "manage message filters",
     "set up another account", "import from another program",
@@ -35,6 +40,90 @@ class ThunderbirdCompressor(BaseA11yCompressor):
     "end-to-end encryption",
     "explore features", "make a donation",
     "support", "get involved", "developer documentation",
+    })
+    # ★キーワードの部分一致判定を1回の正規表現検索で行う
+    MODAL_KEYWORDS_RE = re.compile("|".join(map(re.escape, sorted(MODAL_KEYWORDS))))
+    DASHBOARD_KEYWORDS_RE = re.compile("|".join(map(re.escape, sorted(DASHBOARD_KEYWORDS))))
+    # ★最短キーワードより短い名前は部分一致し得ないので、正規表現検索を省く
+    _MODAL_KEYWORD_MIN_LEN: int = min(map(len, MODAL_KEYWORDS))
+    _DASHBOARD_KEYWORD_MIN_LEN: int = min(map(len, DASHBOARD_KEYWORDS))
+
+    # ★get_semantic_regions の分類で使うタグ/ロールの集合。
+    #   ループ内の tag / role も sys.intern するので、所属判定は同一オブジェクトで当たる
+    _CONTROL_TAGS: FrozenSet[str] = frozenset(map(sys.intern, (
+        "push-button", "toggle-button", "link", "menu-item", "menu", "toggle-menu-item",
+    )))
+    _MODAL_ROLES: FrozenSet[str] = frozenset(map(sys.intern, ("dialog", "alert")))
+    _LAUNCHER_TAGS: FrozenSet[str] = frozenset(map(sys.intern, ("push-button", "toggle-button", "launcher-app")))
+    _STATUSBAR_NAMES: FrozenSet[str] = frozenset({"You are currently online.", "Done", "Unread:", "Total:"})
+    _DASHBOARD_NAMES: FrozenSet[str] = frozenset({"address book", "account settings", "settings"})
+    _DASHBOARD_LEFT_TAGS: FrozenSet[str] = frozenset(map(sys.intern, ("heading", "paragraph", "label")))
+    _DASHBOARD_RIGHT_TAGS: FrozenSet[str] = frozenset(map(sys.intern, ("heading", "paragraph", "label", "link")))
+
+    # ★各 _compress_* のループで使う定数集合（呼び出しごとに作り直さない）
+    _WINDOW_CTRL_NAMES: FrozenSet[str] = frozenset({"Minimize", "Restore Down", "Close", "AppMenu"})
+    _SETTINGS_NOISE_NAMES: FrozenSet[str] = frozenset({"Home", "Done", "You are currently online."})
+    _SETTINGS_BELOW_FOLD_TAGS: FrozenSet[str] = frozenset({"heading", "label", "list-item"})
+    _ACCOUNT_SIDEBAR_TAGS: FrozenSet[str] = frozenset({"tree-item", "push-button", "link", "list-item", "label"})
+    _ACCOUNT_SIDEBAR_NOISE_NAMES: FrozenSet[str] = frozenset({"You are currently online.", "Done"})
+    _ACCOUNT_INPUT_TAGS: FrozenSet[str] = frozenset({"entry", "check-box", "combo-box", "push-button"})
+
+    # ★Add-ons Manager / Compose の分類で使う部分一致キーワード（1回の正規表現検索で判定）
+    _ADDONS_NAV_KEYWORDS: FrozenSet[str] = frozenset({
+        "recommendations", "extensions", "themes", "languages",
+        "add-ons support", "thunderbird settings",
+    })
+    _ADDONS_TAB_KEYWORDS: FrozenSet[str] = frozenset({"settings", "add-ons manager", "close tab"})
+    _ADDONS_TOOLBAR_KEYWORDS: FrozenSet[str] = frozenset({
+        "search addons.thunderbird.net",
+        "tools for all add-ons",
+        "find more add-ons",
+    })
+    _ADDONS_NAV_RE = re.compile("|".join(map(re.escape, sorted(_ADDONS_NAV_KEYWORDS))))
+    _ADDONS_TAB_RE = re.compile("|".join(map(re.escape, sorted(_ADDONS_TAB_KEYWORDS))))
+    _ADDONS_TOOLBAR_RE = re.compile("|".join(map(re.escape, sorted(_ADDONS_TOOLBAR_KEYWORDS))))
+    _COMPOSE_FIELD_RE = re.compile("from|to|subject")
+
+    # ★_detect_view_type 用の定数集合（ldisp は小文字化済みの表示文字列）
+    _VIEW_COMPOSE_SIGNALS: FrozenSet[str] = frozenset({
+        "from", "to", "subject", "cc", "bcc",
+        "send", "attach", "spelling",
+    })
+    _VIEW_COMPOSE_TAGS: FrozenSet[str] = frozenset({"label", "entry", "push-button", "combo-box", "toggle-button"})
+    _VIEW_COMPOSE_FIELD_KEYS: FrozenSet[str] = frozenset({"from", "to", "subject", "cc", "bcc"})
+    _VIEW_COMPOSE_FIELD_TAGS: FrozenSet[str] = frozenset({"label", "entry", "combo-box"})
+    _VIEW_ACCOUNT_KEYWORDS: FrozenSet[str] = frozenset({
+        "account name",
+        "message storage",
+        "message store type",
+        "local directory",
+    })
+    _VIEW_MAIL_KEYWORDS: FrozenSet[str] = frozenset({"quick filter", "message list display options"})
+    _VIEW_HOME_HEADINGS: FrozenSet[str] = frozenset({
+        "set up another account",
+        "import from another program",
+        "about mozilla thunderbird",
+        "resources",
+    })
+    _VIEW_SETTINGS_NAV: FrozenSet[str] = frozenset({"general", "composition", "privacy & security", "chat"})
+    _VIEW_ADDONS_NAV: FrozenSet[str] = frozenset({"recommendations", "extensions", "themes", "languages"})
+    # 完全一致で見る (tag, ldisp) の組。いずれか1つでも含まれれば成立
+    _VIEW_MESSAGE_BODY_PAIRS: FrozenSet[Tuple[str, str]] = frozenset({
+        ("document-web", "message body"), ("document-web", "body"),
+    })
+    _VIEW_ADDONS_GUARD_PAIRS: FrozenSet[Tuple[str, str]] = frozenset({
+        ("label", "find more add-ons"),
+        ("heading", "manage your themes"),
+        ("heading", "manage your extensions"),
+        ("push-button", "tools for all add-ons"),
+    })
+
+    # ★Settings サイドバーの重複排除用: tag → 比較キー用の「負の」優先度（小さいほど優先）。
+    #   label, push-button, menu-item はサイドバーナビゲーションではないので載せない（= 除外）
+    _SETTINGS_SIDEBAR_NEG_PRIORITY: Dict[str, int] = {
+        "link": -3,
+        "list-item": -2,
+        "tree-item": -2,
     }
 
     ACCOUNT_SETUP_BUTTON_SHORT: Dict[str, str] = {
@@ -52,7 +141,57 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         super().__init__(*args, **kwargs)
         self._prev_view_type = None
         self._view_change_cooldown = 0  # view切替直後のフレーム数（1 or 2 推奨）
+        # ★bbox / 中心座標のキャッシュ: id(n) -> (n, bbox, center)
+        #   ノード自体も保持して id の再利用を防ぐ。get_semantic_regions の入口と
+        #   _build_output の最後で破棄する
+        self._bbox_cache: Dict[int, Tuple[Node, Dict[str, int], Tuple[int, int]]] = {}
+        # ★表示用文字列のキャッシュ: id(n) -> (n, 小文字 tag, strip 済み表示名)
+        #   get_semantic_regions の分類ループで計算したものをそのまま整形にも使う（寿命は _bbox_cache と同じ）
+        self._text_cache: Dict[int, Tuple[Node, str, str]] = {}
+
+    def _geom(self, n: Node) -> Tuple[Node, Dict[str, int], Tuple[int, int]]:
+        entry = self._bbox_cache.get(id(n))
+        if entry is None:
+            bbox = node_bbox_from_raw(n)
+            entry = (n, bbox, bbox_to_center_tuple(bbox))
+            self._bbox_cache[id(n)] = entry
+        return entry
+
+    def _bbox(self, n: Node) -> Dict[str, int]:
+        """node_bbox_from_raw のキャッシュ版 (返り値は共有されるので書き換えないこと)"""
+        return self._geom(n)[1]
+
+    def _center(self, n: Node) -> Tuple[int, int]:
+        """bbox_to_center_tuple(node_bbox_from_raw(n)) のキャッシュ版"""
+        return self._geom(n)[2]
+
+    def _text(self, n: Node) -> Tuple[str, str]:
+        """(小文字 tag, strip 済み表示名) のキャッシュ版"""
+        entry = self._text_cache.get(id(n))
+        if entry is None:
+            entry = (
+                n,
+                (n.get("tag") or "").lower(),
+                (n.get("name") or n.get("text") or "").strip(),
+            )
+            self._text_cache[id(n)] = entry
+        return entry[1], entry[2]
+
+    @staticmethod
+    def _sorted_by_keys(nodes: List[Node], keys: List[Any]) -> List[Node]:
+        """
+        ★decorate-sort-undecorate: keys[i] を nodes[i] のソートキーとして安定ソートする。
+        キーは呼び出し側で1ノード1回だけ作り、比較時にはラムダを呼ばない。
+        region はたいてい文書順 = 座標順に積まれているので、キーが既に昇順ならソートせずに複製を返す。
+        """
+        if all(map(le, keys, islice(keys, 1, None))):
+            return list(nodes)
+        return [nodes[i] for i in sorted(range(len(nodes)), key=keys.__getitem__)]
 
+    def _sorted_yx(self, nodes: List[Node]) -> List[Node]:
+        """bbox の (y, x) 順に安定ソートしたリストを返す"""
+        keys = [(b["y"], b["x"]) for b in map(self._bbox, nodes)]
+        return self._sorted_by_keys(nodes, keys)
 
 
     def get_semantic_regions(
@@ -85,156 +224,210 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         TB_TOOLBAR_BOTTOM_Y = 100 
         SIDEBAR_HEADER_BOTTOM_Y = 150
         BOTTOM_AREA_Y = 1060 
+        LAUNCHER_MAX_W = w * 0.12
+
+        # ★分類ループ内で参照する属性・領域リストはローカルに束ねておく（ループ内の属性/辞書参照を省く）
+        control_tags = self._CONTROL_TAGS
+        modal_roles = self._MODAL_ROLES
+        launcher_tags = self._LAUNCHER_TAGS
+        statusbar_names = self._STATUSBAR_NAMES
+        dashboard_names = self._DASHBOARD_NAMES
+        dashboard_left_tags = self._DASHBOARD_LEFT_TAGS
+        dashboard_right_tags = self._DASHBOARD_RIGHT_TAGS
+        modal_keywords = self.MODAL_KEYWORDS
+        dashboard_keywords = self.DASHBOARD_KEYWORDS
+        modal_search = self.MODAL_KEYWORDS_RE.search
+        dashboard_search = self.DASHBOARD_KEYWORDS_RE.search
+        modal_min_len = self._MODAL_KEYWORD_MIN_LEN
+        dashboard_min_len = self._DASHBOARD_KEYWORD_MIN_LEN
+        intern = sys.intern
+
+        # 各 region への追加は append メソッドを束縛して呼ぶ（HOME_DASHBOARD は空判定にもリストを使う）
+        modal_append = regions["MODAL"].append
+        launcher_append = regions["APP_LAUNCHER"].append
+        top_bar_append = regions["TOP_BAR"].append
+        statusbar_append = regions["STATUSBAR"].append
+        spaces_bar_append = regions["SPACES_BAR"].append
+        sidebar_header_append = regions["SIDEBAR_HEADER"].append
+        folder_tree_append = regions["FOLDER_TREE"].append
+        toolbar_append = regions["TOOLBAR"].append
+        dashboard_out = regions["HOME_DASHBOARD"]
+        dashboard_append = dashboard_out.append
+        message_list_append = regions["MESSAGE_LIST"].append
+        preview_append = regions["PREVIEW"].append
+
+        # ★座標は列指向の表 (nodes_to_soa) で一度だけ作り、列を zip して読む。
+        #   新しいフレームなので前回の座標キャッシュは捨て、同じ表から作り直す
+        soa = nodes_to_soa(nodes)
+        self._bbox_cache = {
+            id(n): (n, b, (cx, cy))
+            for n, b, cx, cy in zip(nodes, soa["bboxes"], soa["cxs"], soa["cys"])
+        }
+        # ★tag / 表示名は下の分類ループで1ノード1回だけ作り、整形用にも残す
+        text_cache = self._text_cache = {}
+        for n, x, bw, bh, cx, cy in zip(
+            nodes, soa["xs"], soa["ws"], soa["hs"], soa["cxs"], soa["cys"]
+        ):
 
-        for n in nodes:
-            bbox = node_bbox_from_raw(n)
-            x, y, bw, bh = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
-            cx, cy = bbox_to_center_tuple(bbox)
-
-            tag  = (n.get("tag") or "").lower()
-            role = (n.get("role") or "").lower()
-            name = (n.get("name") or n.get("text") or "").strip()
+            get = n.get
+            tag  = intern((get("tag") or "").lower())
+            role = intern((get("role") or "").lower())
+            name = (get("name") or get("text") or "").strip()
             name_lower = name.lower()
+            name_len = len(name_lower)
+            text_cache[id(n)] = (n, tag, name)
             
             # --- 1. MODAL ---
-            is_control = tag in {"push-button", "toggle-button", "link", "menu-item", "menu", "toggle-menu-item"}
-            if role in {"dialog", "alert"} or (
-                not is_control and any(k in name_lower for k in self.MODAL_KEYWORDS)
+            is_control = tag in control_tags
+            if role in modal_roles or (
+                not is_control and name_len >= modal_min_len and (
+                    # 完全一致は集合で即決、それ以外だけ正規表現で部分一致を探す
+                    name_lower in modal_keywords or modal_search(name_lower)
+                )
             ):
-                regions["MODAL"].append(n)
+                modal_append(n)
                 continue
 
             # --- 2. OS / System UI ---
-            if x < LAUNCHER_X_LIMIT and bh > 32 and bw < w * 0.12 and tag in {"push-button", "toggle-button", "launcher-app"}:
-                regions["APP_LAUNCHER"].append(n)
+            if x < LAUNCHER_X_LIMIT and bh > 32 and bw < LAUNCHER_MAX_W and tag in launcher_tags:
+                launcher_append(n)
                 continue
 
             if cy < TOP_BAR_MAX_Y:
-                regions["TOP_BAR"].append(n)
+                top_bar_append(n)
                 continue
             
             # --- 3. Status Bar (最優先判定) ---
             # ★修正: 名前完全一致なら座標無視でステータスバーへ
-            if name in {"You are currently online.", "Done", "Unread:", "Total:"}:
-                regions["STATUSBAR"].append(n)
+            if name in statusbar_names:
+                statusbar_append(n)
                 continue
 
             # 座標判定: 画面最下部
-            if cy > BOTTOM_AREA_Y and cy < 1080:
-                regions["STATUSBAR"].append(n)
+            if BOTTOM_AREA_Y < cy < 1080:
+                statusbar_append(n)
                 continue
 
             # --- 4. Thunderbird Left Columns ---
             if cx < SPACES_BAR_MAX_X and bw < 60:
-                regions["SPACES_BAR"].append(n)
+                spaces_bar_append(n)
                 continue
 
             if SPACES_BAR_MAX_X <= cx < SPLIT_SIDEBAR_X:
                 if cy < SIDEBAR_HEADER_BOTTOM_Y:
-                    regions["SIDEBAR_HEADER"].append(n)
+                    sidebar_header_append(n)
                 else:
-                    regions["FOLDER_TREE"].append(n)
+                    folder_tree_append(n)
                 continue
 
             # --- 5. Main Content Area ---
             if cy < TB_TOOLBAR_BOTTOM_Y:
-                regions["TOOLBAR"].append(n)
+                toolbar_append(n)
                 continue
 
-            if any(k in name_lower for k in self.DASHBOARD_KEYWORDS) or \
-               (name_lower in {"address book", "account settings", "settings"}):
-                regions["HOME_DASHBOARD"].append(n)
+            if name_lower in dashboard_keywords or name_lower in dashboard_names or \
+               (name_len >= dashboard_min_len and dashboard_search(name_lower)):
+                dashboard_append(n)
                 continue
             
             if cx < SPLIT_LIST_X:
-                if regions["HOME_DASHBOARD"] and tag in {"heading", "paragraph", "label"} and bh > 20:
-                     regions["HOME_DASHBOARD"].append(n)
+                if dashboard_out and tag in dashboard_left_tags and bh > 20:
+                     dashboard_append(n)
                 else:
-                     regions["MESSAGE_LIST"].append(n)
+                     message_list_append(n)
             else:
-                if regions["HOME_DASHBOARD"] and tag in {"heading", "paragraph", "label", "link"}:
-                     regions["HOME_DASHBOARD"].append(n)
+                if dashboard_out and tag in dashboard_right_tags:
+                     dashboard_append(n)
                 else:
-                     regions["PREVIEW"].append(n)
+                     preview_append(n)
 
         return regions
 
     # === フォーマット用ヘルパー ===
-    def _format_node(self, n: Node) -> str:
-        """標準的な [tag] "name" @ (cx, cy) 形式で出力"""
-        bbox = node_bbox_from_raw(n)
-        cx, cy = bbox_to_center_tuple(bbox)
-        
-        tag = (n.get("tag") or "").lower()
-        name = (n.get("name") or n.get("text") or "").strip()
-        
+    def _format_node(self, n: Node, tag: Optional[str] = None, name: Optional[str] = None) -> str:
+        """
+        標準的な [tag] "name" @ (cx, cy) 形式で出力
+        tag / name: 呼び出し側で計算済みの小文字 tag / strip 済み表示名があれば渡す
+        """
+        key = self._line_key(n, tag, name)
+        return self._format_key(key) if key is not None else ""
+
+    def _line_key(self, n: Node, tag: Optional[str] = None, name: Optional[str] = None) -> Optional[LineKey]:
+        """
+        ★_format_node の出力行を決める (tag, name, 中心座標)。名前が空 (= 空行) なら None。
+        重複判定は整形済み文字列ではなくこのタプルで行い、文字列は初出のときだけ作る。
+        """
+        if name is None or tag is None:
+            cached_tag, cached_name = self._text(n)
+            if name is None:
+                name = cached_name
+            if tag is None:
+                tag = cached_tag
         if not name:
-            return ""
-            
+            return None
+        return (tag, name, self._center(n))
+
+    @staticmethod
+    def _format_key(key: LineKey) -> str:
+        tag, name, (cx, cy) = key
         return f"[{tag}] \"{name}\" @ ({cx}, {cy})"
 
     # === 圧縮関数群 ===
 
-    def _compress_app_launcher(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[1]
-        )
-        seen = set()
-        for n in sorted_nodes:
-            line = self._format_node(n)
-            if not line or line in seen: continue
-            seen.add(line)
-            lines.append(line)
+    def _format_lines(self, nodes: List[Node], dedup: bool = True, keep_blank: bool = False) -> List[str]:
+        """
+        ★並び替え済みのノードを1回の走査で整形し、空行を落とす。
+        dedup=True なら同じ行は初出だけ残す。重複判定は _line_key のタプルで行い、
+        重複ノードは整形自体を省く。
+        keep_blank=True なら _dedup_lines([_format_node(n) ...]) と同じく、
+        名前の無いノードの空行 "" も（重複排除したうえで）1つ残す。
+        """
+        if not dedup:
+            return [line for line in map(self._format_node, nodes) if line]
+
+        lines: List[str] = []
+        seen: Set[Optional[LineKey]] = set()
+        # ループ内で使うメソッドはローカルに束縛しておく
+        line_key, format_key = self._line_key, self._format_key
+        seen_add, lines_append = seen.add, lines.append
+        for n in nodes:
+            key = line_key(n)
+            if key is None and not keep_blank:
+                continue
+            if key in seen:
+                continue
+            seen_add(key)
+            lines_append(format_key(key) if key is not None else "")
         return lines
 
+    def _compress_linear(
+        self,
+        nodes: List[Node],
+        axis: int,
+        reject_names: FrozenSet[str] = frozenset(),
+    ) -> List[str]:
+        """
+        ★1列に並ぶ領域（ランチャー / トップバー / スペースバー / ツールバー）の共通処理。
+        中心座標の axis (0=x, 1=y) で安定ソートし、重複を除いて整形する。
+        reject_names: 表示名 (name の strip) がこれに一致するノードは除外する
+        """
+        if not nodes:
+            return []
+        if reject_names:
+            nodes = [n for n in nodes if (n.get("name") or "").strip() not in reject_names]
+        return self._format_lines(self._sorted_by_keys(nodes, [c[axis] for c in map(self._center, nodes)]))
+
+    def _compress_app_launcher(self, nodes: List[Node]) -> List[str]:
+        return self._compress_linear(nodes, 1)
+
     def _compress_top_bar(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[0]
-        )
-        seen = set()
-        for n in sorted_nodes:
-            line = self._format_node(n)
-            if not line or line in seen: continue
-            seen.add(line)
-            lines.append(line)
-        return lines
+        return self._compress_linear(nodes, 0)
 
     def _compress_spaces_bar(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[1]
-        )
-        seen = set()
-        for n in sorted_nodes:
-            line = self._format_node(n)
-            if not line or line in seen: continue
-            seen.add(line)
-            lines.append(line)
-        return lines
+        return self._compress_linear(nodes, 1)
 
     def _compress_toolbar(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        sorted_nodes = sorted(
-            nodes,
-            key=lambda n: bbox_to_center_tuple(node_bbox_from_raw(n))[0]
-        )
-        seen = set()
-        for n in sorted_nodes:
-            name = (n.get("name") or "").strip()
-            if name in {"Minimize", "Restore Down", "Close", "AppMenu"}:
-                continue
-            
-            line = self._format_node(n)
-            if not line or line in seen: continue
-            seen.add(line)
-            lines.append(line)
-        return lines
-        
+        return self._compress_linear(nodes, 0, self._WINDOW_CTRL_NAMES)
 
     def _compress_folder_tree(self, nodes: List[Node]) -> List[str]:
         """フォルダツリー: ルート名(@, Local Folders)ベースで階層表現 + 座標"""
@@ -243,17 +436,12 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         items: List[Node] = [
             n for n in nodes
-            if (n.get("tag") or "").lower() == "tree-item"
+            if self._text(n)[0] == "tree-item"
         ]
         if not items:
             return []
 
-        items.sort(
-            key=lambda n: (
-                node_bbox_from_raw(n)["y"],
-                node_bbox_from_raw(n)["x"],
-            )
-        )
+        items = self._sorted_yx(items)
 
         def is_root_name(name: str) -> bool:
             if not name:
@@ -283,36 +471,39 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                     groups[-1][1].append(n)
 
         lines: List[str] = []
-        seen_keys: Set[str] = set()
+        seen_keys: Set[LineKey] = set()
 
         for root, children in groups:
             if root is not None:
-                root_line = self._format_node(root)
-                if root_line and root_line not in seen_keys:
-                    seen_keys.add(root_line)
-                    lines.append(root_line)
+                root_key = self._line_key(root)
+                if root_key is not None and root_key not in seen_keys:
+                    seen_keys.add(root_key)
+                    lines.append(self._format_key(root_key))
 
                 for c in children:
-                    child_line = self._format_node(c)
-                    if not child_line or child_line in seen_keys:
+                    child_key = self._line_key(c)
+                    if child_key is None or child_key in seen_keys:
                         continue
-                    seen_keys.add(child_line)
-                    lines.append("  " + child_line)
+                    seen_keys.add(child_key)
+                    lines.append("  " + self._format_key(child_key))
             else:
                 for c in children:
-                    child_line = self._format_node(c)
-                    if not child_line or child_line in seen_keys:
+                    child_key = self._line_key(c)
+                    if child_key is None or child_key in seen_keys:
                         continue
-                    seen_keys.add(child_line)
-                    lines.append(child_line)
+                    seen_keys.add(child_key)
+                    lines.append(self._format_key(child_key))
 
         return lines
 
 
     # === Home Dashboard のセクション分割ロジック ===
     def _split_home_sections(self, nodes: List[Node]) -> Dict[str, List[Node]]:
+        """
+        y 順にセクション見出しで区切る。
+        """
         sections: Dict[str, List[Node]] = {}
-        nodes = sorted(nodes, key=lambda n: node_bbox_from_raw(n)["y"])
+        nodes = self._sorted_by_keys(nodes, [b["y"] for b in map(self._bbox, nodes)])
         current_section = "Unknown"
         sections[current_section] = []
         
@@ -340,124 +531,66 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         sections = self._split_home_sections(nodes)
         
+        # ★_split_home_sections は y ソート済みで各セクションへ振り分けるので、先頭ノードの y が最小値
+        #   (全ノードがいずれかのセクションに入るので、セクション外の孤立ノードは無い)
         sorted_sections = []
         for title, section_nodes in sections.items():
             if section_nodes:
-                min_y = min(node_bbox_from_raw(n)["y"] for n in section_nodes)
-                sorted_sections.append((min_y, title, section_nodes))
-        sorted_sections.sort(key=lambda x: x[0])
+                sorted_sections.append((self._bbox(section_nodes[0])["y"], title, section_nodes))
+        sorted_sections.sort(key=itemgetter(0))
 
         lines: List[str] = []
         seen_keys = set()
 
-        all_section_node_ids = {id(n) for _, _, sn in sorted_sections for n in sn}
-        orphans = [n for n in nodes if id(n) not in all_section_node_ids]
-        
-        if orphans:
-            orphans.sort(key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-            for n in orphans:
-                l = self._format_node(n)
-                if l and l not in seen_keys:
-                    seen_keys.add(l)
-                    lines.append(l)
-            if lines: lines.append("")
-
         for _, title, section_nodes in sorted_sections:
-            section_nodes.sort(key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+            section_nodes[:] = self._sorted_yx(section_nodes)
             
             for n in section_nodes:
-                node_for_print = n
-                tag = (n.get("tag") or "").lower()
+                # ★表示名だけ差し替えるときもノードは複製せず、_format_node に名前を渡す
+                display_name: Optional[str] = None
+                tag = self._text(n)[0]
                 name = (n.get("name") or "").strip()
 
                 if title == "Set Up Another Account" and tag == "push-button":
                     short = self.ACCOUNT_SETUP_BUTTON_SHORT.get(name)
                     if short:
-                        node_copy = dict(n)
-                        node_copy["name"] = short
-                        node_for_print = node_copy
+                        display_name = short
 
-                l = self._format_node(node_for_print)
-                if not l or l in seen_keys:
+                key = self._line_key(n, tag=tag, name=display_name)
+                if key is None or key in seen_keys:
                     continue
-                seen_keys.add(l)
-                lines.append(l)
+                seen_keys.add(key)
+                lines.append(self._format_key(key))
 
             lines.append("")
 
         return lines
 
     def _compress_message_list(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        nodes.sort(key=lambda n: node_bbox_from_raw(n)["y"])
-        seen = set()
-        for n in nodes:
-            line = self._format_node(n)
-            if not line or line in seen: continue
-            seen.add(line)
-            lines.append(line)
-        return lines
+        if not nodes:
+            return []
+        nodes[:] = self._sorted_by_keys(nodes, [b["y"] for b in map(self._bbox, nodes)])
+        return self._format_lines(nodes)
 
     def _compress_preview(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        nodes.sort(key=lambda n: node_bbox_from_raw(n)["y"])
-        for n in nodes:
-            line = self._format_node(n)
-            if line: lines.append(line)
-        return lines
+        if not nodes:
+            return []
+        nodes[:] = self._sorted_by_keys(nodes, [b["y"] for b in map(self._bbox, nodes)])
+        return self._format_lines(nodes, dedup=False)
 
     def _compress_statusbar(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        nodes.sort(key=lambda n: node_bbox_from_raw(n)["x"])
-        for n in nodes:
-            bbox = node_bbox_from_raw(n)
-            if bbox["y"] > 1080: 
-                continue
-            line = self._format_node(n)
-            if line: lines.append(line)
-        return lines
+        if not nodes:
+            return []
+        nodes[:] = self._sorted_by_keys(nodes, [b["x"] for b in map(self._bbox, nodes)])
+        return self._format_lines([n for n in nodes if self._bbox(n)["y"] <= 1080], dedup=False)
 
     def _compress_modal(self, nodes: List[Node]) -> List[str]:
-        lines = []
-        nodes.sort(key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-        for n in nodes:
-            line = self._format_node(n)
-            if line: lines.append(line)
-        return lines
-    
-    # ==== Settings helpers ====
-
-    def _split_by_vertical_position(
-        self,
-        nodes: List[Node],
-        screen_h: int,
-        visible_ratio: float = 1.1,
-        scroll_ratio: float = 2.5,
-    ) -> Tuple[List[Node], List[Node], List[Node]]:
-        """
-        Split nodes into:
-        - visible       : roughly within current viewport
-        - below_fold    : 1〜2画面分くらいスクロールしたあたり
-        - deep          : それよりさらに下（通常は捨てる）
-        """
         if not nodes:
-            return [], [], []
-
-        visible_limit = int(screen_h * visible_ratio)
-        scroll_limit = int(screen_h * scroll_ratio)
-
-        visible, below_fold, deep = [], [], []
-        for n in nodes:
-            cy = bbox_to_center_tuple(node_bbox_from_raw(n))[1]
-            if cy <= visible_limit:
-                visible.append(n)
-            elif cy <= scroll_limit:
-                below_fold.append(n)
-            else:
-                deep.append(n)
-        return visible, below_fold, deep
-
+            return []
+        nodes[:] = self._sorted_yx(nodes)
+        return self._format_lines(nodes, dedup=False)
     
+    # ==== Settings helpers ====
 
     def _compress_settings_sidebar(self, nodes: List[Node]) -> List[str]:
         """
@@ -468,55 +601,41 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if not nodes:
             return []
 
-        # 重複排除用の優先順位定義
-        TAG_PRIORITY = {
-            "link": 3,
-            "list-item": 2,
-            "tree-item": 2,
-            # label, push-button, menu-item はサイドバーナビゲーションではないので除外
-        }
+        neg_priority = self._SETTINGS_SIDEBAR_NEG_PRIORITY
 
-        # 名前ごとにノードをグルーピング
-        grouped: Dict[str, List[Node]] = {}
+        # ★名前ごとに (−優先度, y) が最小のノードだけを 1 パスで保持する。
+        #   同点は先勝ち（旧実装の stable sort の [0] と同じ）、dict の挿入順も名前の初出順のまま
+        best: Dict[str, Tuple[int, int, Node]] = {}
         for n in nodes:
             name = (n.get("name") or "").strip()
             if not name: 
                 continue
             
-            # ★追加フィルタ: サイドバーとして不適切なタグを除外
-            tag = (n.get("tag") or "").lower()
-            if tag not in TAG_PRIORITY:
+            # ★追加フィルタ: サイドバーとして不適切なタグを除外（表引き1回で判定と優先度取得を兼ねる）
+            pri = neg_priority.get(self._text(n)[0])
+            if pri is None:
                 continue
 
             # ★追加フィルタ: x座標が明らかに右側にあるもの(Doneなど)が混ざらないようガード
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             if bbox["x"] > 350:
                 continue
 
-            if name not in grouped:
-                grouped[name] = []
-            grouped[name].append(n)
-
-        unique_nodes = []
-        for name, group in grouped.items():
-            best_node = sorted(
-                group, 
-                key=lambda n: (
-                    -TAG_PRIORITY.get((n.get("tag") or "").lower(), 0), 
-                    node_bbox_from_raw(n)["y"] 
-                )
-            )[0]
-            unique_nodes.append(best_node)
+            y = bbox["y"]
+            cur = best.get(name)
+            if cur is None or (pri, y) < cur[:2]:
+                best[name] = (pri, y, n)
 
-        unique_nodes.sort(key=lambda n: node_bbox_from_raw(n)["y"])
+        unique_nodes = [v[2] for v in best.values()]
+        unique_nodes = self._sorted_by_keys(unique_nodes, [b["y"] for b in map(self._bbox, unique_nodes)])
 
         lines: List[str] = []
         seen = set()
         for n in unique_nodes:
-            line = self._format_node(n)
-            if line and line not in seen:
-                seen.add(line)
-                lines.append(line)
+            key = self._line_key(n)
+            if key is not None and key not in seen:
+                seen.add(key)
+                lines.append(self._format_key(key))
 
         return lines
 
@@ -528,32 +647,32 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if not nodes:
             return []
 
-        nodes = sorted(nodes, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+        nodes = self._sorted_yx(nodes)
         lines: List[str] = []
         seen = set()
 
         for n in nodes:
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             name = (n.get("name") or "").strip()
 
-            if tag in {"document-web"}:
+            if tag == "document-web":
                 continue
 
             # ★追加: Status Barに分類されるべきものが紛れ込んでいたら除外
             # (get_semantic_regionsで分類しきれなかった場合の安全策)
-            if name in {"Home", "Done", "You are currently online."} and node_bbox_from_raw(n)["y"] > 1000:
+            if name in self._SETTINGS_NOISE_NAMES and self._bbox(n)["y"] > 1000:
                 continue
 
             # 渡された fold_y (1080など) を基準に判定
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             if bbox["y"] > fold_y:
                 continue
 
-            line = self._format_node(n)
-            if not line or line in seen:
+            key = self._line_key(n)
+            if key is None or key in seen:
                 continue
-            seen.add(line)
-            lines.append(line)
+            seen.add(key)
+            lines.append(self._format_key(key))
 
         return lines
 
@@ -565,23 +684,54 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if not nodes:
             return []
 
-        nodes = sorted(nodes, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+        nodes = self._sorted_yx(nodes)
         lines: List[str] = []
         seen = set()
 
         for n in nodes:
-            tag = (n.get("tag") or "").lower()
-            if tag not in {"heading", "label", "list-item"}:
+            tag = self._text(n)[0]
+            if tag not in self._SETTINGS_BELOW_FOLD_TAGS:
                 continue
 
-            line = self._format_node(n)
-            if not line or line in seen:
+            key = self._line_key(n)
+            if key is None or key in seen:
                 continue
-            seen.add(line)
-            lines.append(line)
+            seen.add(key)
+            lines.append(self._format_key(key))
 
         return lines
 
+    def _partition_settings_nodes(
+        self, nodes: Any, split_x: int, fold_y: int
+    ) -> Tuple[List[Node], List[Node], List[Node]]:
+        """
+        ★Settings 系ビューのノードを1回の走査で振り分ける。
+        (左サイドバーの画面内, 本体の画面内, 本体のスクロール先) を返す。
+        最上部 (y < 50) は捨て、サイドバーの画面外も捨てる。
+        スクロール先は fold_y〜fold_y*10 の範囲のノードのあとに、それより下のノードを続けた並び。
+        """
+        visible_limit = int(fold_y * 1.0)
+        scroll_limit = int(fold_y * 10.0)
+        sidebar_visible: List[Node] = []
+        content_visible: List[Node] = []
+        below_fold: List[Node] = []
+        deep: List[Node] = []
+        for n in nodes:
+            _, bbox, (_, cy) = self._geom(n)
+            if bbox["y"] < 50:
+                continue
+            if bbox["x"] <= split_x:
+                if cy <= visible_limit:
+                    sidebar_visible.append(n)
+            elif cy <= visible_limit:
+                content_visible.append(n)
+            elif cy <= scroll_limit:
+                below_fold.append(n)
+            else:
+                deep.append(n)
+        below_fold.extend(deep)
+        return sidebar_visible, content_visible, below_fold
+
     def _compress_settings_view(
         self,
         regions: Dict[str, List[Node]],
@@ -594,43 +744,29 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         fold_y = 1080
 
         # 必要な領域を統合 (MESSAGE_LISTなども含めて全量をチェック)
-        all_settings_nodes = []
-        for k in ["HOME_DASHBOARD", "MESSAGE_LIST", "PREVIEW", "DASHBOARD", 
-                  "FOLDER_TREE", "SIDEBAR", "SIDEBAR_HEADER", "CONTENT"]:
-            all_settings_nodes.extend(regions.get(k, []))
+        region_lists = [
+            regions.get(k, [])
+            for k in ["HOME_DASHBOARD", "MESSAGE_LIST", "PREVIEW", "DASHBOARD", 
+                      "FOLDER_TREE", "SIDEBAR", "SIDEBAR_HEADER", "CONTENT"]
+        ]
 
-        if not all_settings_nodes:
+        if not any(region_lists):
             return lines
 
-        sidebar_nodes: List[Node] = []
-        content_nodes: List[Node] = []
         split_x = 420
 
-
-        for n in all_settings_nodes:
-            bbox = node_bbox_from_raw(n)
-            if bbox["y"] < 50: 
-                continue
-            
-            x = bbox["x"]
-            if x <= split_x:
-                sidebar_nodes.append(n)
-            else:
-                content_nodes.append(n)
-
+        # ★左右分割と上下分割 (画面内 / スクロール先) を1回の走査で行う
         # ★修正: scroll_ratio を 10.0 に増やし、
         # 下の方にある項目(Work, Personal等)を deep ではなく below_fold として拾うように調整
-        visible_content, below_fold_content, deep_content = self._split_by_vertical_position(
-            content_nodes, fold_y, visible_ratio=1.0, scroll_ratio=10.0
-        )
         # 念のため deep も結合する
-        below_fold_content.extend(deep_content)
+        visible_sidebar, visible_content, below_fold_content = self._partition_settings_nodes(
+            chain.from_iterable(region_lists), split_x, fold_y
+        )
 
         # --- 出力構築 ---
         lines.append("=== SETTINGS ===")
 
         # 左サイドバー
-        visible_sidebar, _, _ = self._split_by_vertical_position(sidebar_nodes, fold_y, visible_ratio=1.0)
         sidebar_lines = self._compress_settings_sidebar(visible_sidebar)
         if sidebar_lines:
             lines.append("=== SETTINGS SIDEBAR ===")
@@ -660,45 +796,27 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         lines: List[str] = []
         fold_y = 1080
 
-        all_nodes = []
         target_regions = [
             "HOME_DASHBOARD", "MESSAGE_LIST", "PREVIEW", "DASHBOARD", 
             "FOLDER_TREE", "SIDEBAR", "SIDEBAR_HEADER", "CONTENT", "MODAL"
         ]
-        for k in target_regions:
-            all_nodes.extend(regions.get(k, []))
-        
+        region_lists = [regions.get(k, []) for k in target_regions]
         if modal_nodes:
-            all_nodes.extend(modal_nodes)
+            region_lists.append(modal_nodes)
 
-        if not all_nodes:
+        if not any(region_lists):
             return lines
 
-        sidebar_nodes: List[Node] = []
-        content_nodes: List[Node] = []
         split_x = 320 
 
-        for n in all_nodes:
-            bbox = node_bbox_from_raw(n)
-            if bbox["y"] < 50: 
-                continue
-            
-            x = bbox["x"]
-            if x <= split_x:
-                sidebar_nodes.append(n)
-            else:
-                content_nodes.append(n)
-
-        # 上下分割
-        visible_content, below_fold_content, deep_content = self._split_by_vertical_position(
-            content_nodes, fold_y, visible_ratio=1.0, scroll_ratio=10.0
+        # 左右分割 + 上下分割を1回の走査で
+        visible_sidebar, visible_content, below_fold_content = self._partition_settings_nodes(
+            chain.from_iterable(region_lists), split_x, fold_y
         )
-        below_fold_content.extend(deep_content)
 
         lines.append("=== ACCOUNT SETTINGS ===")
 
         # サイドバー (インデント付き)
-        visible_sidebar, _, _ = self._split_by_vertical_position(sidebar_nodes, fold_y, visible_ratio=1.0)
         sidebar_lines = self._compress_account_settings_sidebar(visible_sidebar)
         if sidebar_lines:
             lines.append("=== ACCOUNT SETTINGS SIDEBAR ===")
@@ -725,48 +843,48 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         Account Settings サイドバー。
         - X座標に基づいてインデントを付与し、階層構造を可視化する。
         - ステータスバー要素が紛れ込まないようフィルタする。
+        ★nodes は _partition_settings_nodes で x <= split_x (320) に絞られたものが来るので、
+          右側ノードの x ガードはここでは行わない。
         """
         if not nodes:
             return []
 
-        VALID_TAGS = {"tree-item", "push-button", "link", "list-item", "label"}
+        VALID_TAGS = self._ACCOUNT_SIDEBAR_TAGS
 
         
         # y順、x順
-        nodes = sorted(nodes, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+        nodes = self._sorted_yx(nodes)
         
         # インデント計算用の基準X座標を探す
         # 極端に左にあるものは無視して、tree-item の最小Xを探す
-        tree_items_x = [node_bbox_from_raw(n)["x"] for n in nodes if (n.get("tag")=="tree-item")]
+        tree_items_x = [self._bbox(n)["x"] for n in nodes if (n.get("tag")=="tree-item")]
         base_x = min(tree_items_x) if tree_items_x else 0
 
         lines: List[str] = []
         seen = set()
 
         for n in nodes:
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             name = (n.get("name") or "").strip()
             if not name: continue
             
             if tag not in VALID_TAGS: continue
 
             # ノイズ除去
-            if name in {"You are currently online.", "Done"}: continue
-            if node_bbox_from_raw(n)["x"] > 520: continue
+            if name in self._ACCOUNT_SIDEBAR_NOISE_NAMES: continue
 
             # インデント処理
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             # 基準からのズレを 20px 単位でインデント1個分とする（適当なヒューリスティック）
             indent_level = max(0, int((bbox["x"] - base_x) / 15))
             indent_str = "  " * indent_level
 
-            # フォーマット
-            cx, cy = bbox_to_center_tuple(bbox)
-            line = f'{indent_str}[{tag}] "{name}" @ ({cx}, {cy})'
-            
-            if line not in seen:
-                seen.add(line)
-                lines.append(line)
+            # フォーマット（重複判定は行を決める値のタプルで行い、文字列は初出のときだけ作る）
+            cx, cy = self._center(n)
+            key = (indent_level, tag, name, cx, cy)
+            if key not in seen:
+                seen.add(key)
+                lines.append(f'{indent_str}[{tag}] "{name}" @ ({cx}, {cy})')
 
         return lines
 
@@ -785,64 +903,67 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         filtered_nodes = []
         for n in nodes:
             name = (n.get("name") or "").strip()
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             
             # 不要なタブ (Settings)
             if tag == "section" and name == "Settings":
                 continue
             # 不要な閉じるボタン (Settingsタブの近辺にあると推測される)
             # Account Settings タブよりも左(x<600くらい)にある Close Tab は消す
-            if name == "Close Tab" and node_bbox_from_raw(n)["x"] < 600:
+            if name == "Close Tab" and self._bbox(n)["x"] < 600:
                 continue
             
             filtered_nodes.append(n)
 
         # 2. ソート (Y優先、次にX)
-        nodes = sorted(filtered_nodes, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+        nodes = self._sorted_yx(filtered_nodes)
         
         lines: List[str] = []
-        skip_next = False
-        
-        for i, n in enumerate(nodes):
-            if skip_next:
-                skip_next = False
+
+        # ★先読み1個のストリームで処理する（添字アクセスと skip フラグを使わない）。
+        #   結合したら次のノードは消費済みなので、さらに次を読み進める
+        it = iter(nodes)
+        n = next(it, None)
+        while n is not None:
+            next_n = next(it, None)
+
+            bbox = self._bbox(n)
+            if bbox["y"] > fold_y: # 画面外は無視
+                n = next_n
                 continue
-            
-            bbox = node_bbox_from_raw(n)
-            if bbox["y"] > fold_y: continue # 画面外は無視
 
-            tag = (n.get("tag") or "").lower()
-            name = (n.get("name") or "").strip()
+            tag = self._text(n)[0]
             
             # --- マージ処理 ---
             # 現在が Label で、次が入力欄なら結合を試みる
-            if tag == "label" and i + 1 < len(nodes):
-                next_n = nodes[i+1]
+            if tag == "label" and next_n is not None:
                 next_tag = (next_n.get("tag") or "").lower()
-                next_name = (next_n.get("name") or "").strip()
-                next_bbox = node_bbox_from_raw(next_n)
-
-                # Y座標が近く(行が同じ)、X座標が右側にあるか確認
-                y_diff = abs(bbox["y"] - next_bbox["y"])
-                if y_diff < 20 and next_bbox["x"] > bbox["x"]:
-                    # 入力欄系タグなら結合
-                    if next_tag in {"entry", "check-box", "combo-box", "push-button"}:
-                        # 結合フォーマット: [tag] "LabelName: ValueName"
-                        # 名前が重複している場合("Account Name:" と "Account Name: ...")のケア
-                        final_name = next_name
-                        if name.rstrip(":") not in next_name:
-                            final_name = f"{name} {next_name}"
-                        
-                        cx, cy = bbox_to_center_tuple(next_bbox)
-                        line = f'[{next_tag}] "{final_name}" @ ({cx}, {cy})'
-                        lines.append(line)
-                        skip_next = True # 次のノードは処理済みとする
-                        continue
+                next_bbox = self._bbox(next_n)
+
+                # Y座標が近く(行が同じ)、X座標が右側にあり、入力欄系タグなら結合
+                if (
+                    abs(bbox["y"] - next_bbox["y"]) < 20
+                    and next_bbox["x"] > bbox["x"]
+                    and next_tag in self._ACCOUNT_INPUT_TAGS
+                ):
+                    name = (n.get("name") or "").strip()
+                    next_name = (next_n.get("name") or "").strip()
+                    # 結合フォーマット: [tag] "LabelName: ValueName"
+                    # 名前が重複している場合("Account Name:" と "Account Name: ...")のケア
+                    final_name = next_name
+                    if name.rstrip(":") not in next_name:
+                        final_name = f"{name} {next_name}"
+                    
+                    cx, cy = self._center(next_n)
+                    lines.append(f'[{next_tag}] "{final_name}" @ ({cx}, {cy})')
+                    n = next(it, None)  # next_n は処理済み
+                    continue
             
             # マージされなかった場合は通常出力
-            line = self._format_node(n)
+            line = self._format_node(n, tag=tag)
             if line:
                 lines.append(line)
+            n = next_n
 
         return lines
 
@@ -854,9 +975,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if not nodes:
             return []
 
-        def tag(n): return (n.get("tag") or "").lower()
+        def tag(n): return self._text(n)[0]
         def nm(n):  return (n.get("name") or "").strip()
-        def bbox(n): return node_bbox_from_raw(n)
+        def bbox(n): return self._bbox(n)
 
         picked: List[Node] = []
         for n in nodes:
@@ -888,9 +1009,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                 picked.append(n)
                 continue
 
-        picked = sorted(picked, key=lambda n: (bbox(n)["y"], bbox(n)["x"]))
+        picked = self._sorted_yx(picked)
         # 既存の整形/重複除去ユーティリティを使う前提
-        return self._dedup_lines([self._format_node(n) for n in picked])
+        return self._format_lines(picked, keep_blank=True)
 
 
 
@@ -903,23 +1024,19 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         picked: List[Node] = []
         for n in nodes:
-            t = (n.get("tag") or "").lower()
-            nm = (n.get("name") or n.get("text") or "").strip()
-            bbox = node_bbox_from_raw(n)
-
             # タブはだいたい y=90〜150 付近にいる想定
-            if bbox["y"] > 180:
+            if self._bbox(n)["y"] > 180:
                 continue
 
-            txt = ((n.get("name") or n.get("text") or "")).strip()
+            t, txt = self._text(n)
             if t in {"section", "label"} and txt:
                 # "Settings", "Add-ons Manager", アカウント名タブなど
                 picked.append(n)
-            elif t == "push-button" and nm in {"Close Tab"}:
+            elif t == "push-button" and txt in {"Close Tab"}:
                 picked.append(n)
 
-        picked = sorted(picked, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-        return self._dedup_lines([self._format_node(n) for n in picked])
+        picked = self._sorted_yx(picked)
+        return self._format_lines(picked, keep_blank=True)
 
 
     def _compress_addons_sidebar(self, nodes: List[Node]) -> List[str]:
@@ -931,11 +1048,12 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         TAG_PRIORITY = {"link": 4, "list-item": 3, "label": 2, "section": 1, "heading": 1}
 
         def disp(n):
-            return ((n.get("name") or n.get("text") or "")).strip()
+            return self._text(n)[1]
 
-        grouped: Dict[str, List[Node]] = {}
+        # ★表示名ごとに (−優先度, y, x) が最小のノードだけを 1 パスで保持する（同点は先勝ち）
+        best: Dict[str, Tuple[Tuple[int, int, int], Node]] = {}
         for n in nodes:
-            t = (n.get("tag") or "").lower()
+            t = self._text(n)[0]
             if t not in ALLOW_TAGS:
                 continue
 
@@ -943,27 +1061,18 @@ class ThunderbirdCompressor(BaseA11yCompressor):
             if not txt:
                 continue
 
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             if bbox["x"] > SIDEBAR_MAX_X:
                 continue
 
             key = txt.lower()  # ★重複潰しやすく
-            grouped.setdefault(key, []).append(n)
+            rank = (-TAG_PRIORITY[t], bbox["y"], bbox["x"])
+            cur = best.get(key)
+            if cur is None or rank < cur[0]:
+                best[key] = (rank, n)
 
-        picked: List[Node] = []
-        for key, group in grouped.items():
-            best = sorted(
-                group,
-                key=lambda n: (
-                    -TAG_PRIORITY.get((n.get("tag") or "").lower(), 0),
-                    node_bbox_from_raw(n)["y"],
-                    node_bbox_from_raw(n)["x"],
-                ),
-            )[0]
-            picked.append(best)
-
-        picked = sorted(picked, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-        return self._dedup_lines([self._format_node(n) for n in picked])
+        picked = self._sorted_yx([n for _, n in best.values()])
+        return self._format_lines(picked, keep_blank=True)
 
 
 
@@ -986,26 +1095,27 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         filtered: List[Node] = []
         for n in nodes:
-            bbox = node_bbox_from_raw(n)
-            tg = (n.get("tag") or "").lower()
+            bbox = self._bbox(n)
+            tg = self._text(n)[0]
             if bbox["x"] >= CONTENT_LEFT_X and tg in allowed_tags:
                 filtered.append(n)
 
         if not filtered:
             # もし抽出しすぎたら全体で最低限出す
-            filtered = [n for n in nodes if ((n.get("tag") or "").lower() in allowed_tags)]
+            filtered = [n for n in nodes if (self._text(n)[0] in allowed_tags)]
 
         # 読みやすさ：上から下、同じ段なら左から右
-        filtered = sorted(filtered, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+        filtered = self._sorted_yx(filtered)
 
         lines = [self._format_node(n) for n in filtered]
         return self._dedup_lines(lines)
 
 
 
-    def _detect_view_type(self, nodes: List[Node]) -> str:
+    def _detect_view_type(self, node_lists: Sequence[List[Node]]) -> str:
         """
         Thunderbird view type detector (score-based + a few strong guards).
+        node_lists: 判定対象のノードリスト群（各 region のリスト等）。呼び出し側で連結しなくてよい。
 
         Views:
         - "mail"
@@ -1016,17 +1126,111 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         - "compose"
         - "unknown"
         """
+        # 判定本体はノードを複数回走査するので、ここで一度だけ連結する
+        nodes = list(chain.from_iterable(node_lists))
+
         from collections import defaultdict
         from typing import Dict
 
-        def tag(n): return (n.get("tag") or "").lower()
-        def name(n): return (n.get("name") or "").strip()
-        def lower_name(n): return name(n).lower()
-
         # ★ 文字列は disp/ldisp に統一して判定する（name空/text側対応）
-        def disp(n):
-            return ((n.get("name") or n.get("text") or n.get("description") or "")).strip()
-        def ldisp(n): return disp(n).lower()
+        # ★ (tag, ldisp) は1ノード1回だけ作り、完全一致の判定は集合の所属判定で行う。
+        #   部分一致・件数のように走査が必要な判定だけ pairs を回す
+        pairs: List[Tuple[str, str]] = [
+            (
+                (n.get("tag") or "").lower(),
+                ((n.get("name") or n.get("text") or n.get("description") or "")).strip().lower(),
+            )
+            for n in nodes
+        ]
+        pair_set: Set[Tuple[str, str]] = set(pairs)
+
+        compose_signals = self._VIEW_COMPOSE_SIGNALS
+        compose_tags = self._VIEW_COMPOSE_TAGS
+        compose_field_keys = self._VIEW_COMPOSE_FIELD_KEYS
+        compose_field_tags = self._VIEW_COMPOSE_FIELD_TAGS
+        acc_kw = self._VIEW_ACCOUNT_KEYWORDS
+        mail_keywords = self._VIEW_MAIL_KEYWORDS
+        home_headings = self._VIEW_HOME_HEADINGS
+        settings_nav = self._VIEW_SETTINGS_NAV
+        addons_nav = self._VIEW_ADDONS_NAV
+
+        # ★部分一致・件数のシグナルは pairs を1回だけ走査してまとめて数える。
+        #   tag ごとに分岐し、そのタグに関係する判定だけを行う（判定の優先順は下の決定部で従来どおり）
+        compose_hits = 0
+        compose_field_hits = 0
+        has_mail_keyword = False
+        tree_cnt = 0
+        msg_row_hits = 0
+        acc_hits = 0
+        has_account_settings_title = False
+        has_account_label = False
+        home_heading_hits = 0
+        nav_hits = 0
+        addons_hits = 0
+        has_addons_doc = False
+        has_addons_manager_doc = False
+        has_addons_manager_section = False
+        has_addons_url_entry = False
+
+        for t, s in pairs:
+            if s in compose_signals:
+                if t in compose_tags:
+                    compose_hits += 1
+                if s in compose_field_keys and t in compose_field_tags:
+                    compose_field_hits += 1
+            if s in mail_keywords:
+                has_mail_keyword = True
+
+            if t == "tree-item":
+                tree_cnt += 1
+                if "," in s:
+                    msg_row_hits += 1
+            elif t == "label":
+                if s in acc_kw:
+                    acc_hits += 1
+                if "account" in s:
+                    has_account_label = True
+                if s in settings_nav:
+                    nav_hits += 1
+                if s in addons_nav:
+                    addons_hits += 1
+            elif t == "section":
+                if "account settings" in s:
+                    has_account_settings_title = True
+                if s in acc_kw:
+                    acc_hits += 1
+                if "add-ons manager" in s:
+                    has_addons_manager_section = True
+                if s in addons_nav:
+                    addons_hits += 1
+            elif t == "heading":
+                if "account settings" in s:
+                    has_account_settings_title = True
+                if "account" in s:
+                    has_account_label = True
+                if s in home_headings:
+                    home_heading_hits += 1
+            elif t == "document-web":
+                if "account settings" in s:
+                    has_account_settings_title = True
+                if "add-ons" in s:
+                    has_addons_doc = True
+                    if "add-ons manager" in s:
+                        has_addons_manager_doc = True
+            elif t == "list-item":
+                if s in settings_nav:
+                    nav_hits += 1
+                if s in addons_nav:
+                    addons_hits += 1
+            elif t == "link":
+                if s in addons_nav:
+                    addons_hits += 1
+            elif t == "paragraph":
+                if s in acc_kw:
+                    acc_hits += 1
+            elif t == "entry":
+                if "addons.thunderbird.net" in s:
+                    has_addons_url_entry = True
 
         # ----------------------------
         # 1) STRONG GUARDS (確定ルール)
@@ -1034,66 +1238,36 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         # --- Compose (New Message) guard ---
         # "Message body" + (From/To/Subject/Send etc.) の組み合わせで強確定
-        has_message_body = any(
-            tag(n) == "document-web" and ldisp(n) in {"message body", "body"}
-            for n in nodes
-        )
-
-        compose_signals = {
-            "from", "to", "subject", "cc", "bcc",
-            "send", "attach", "spelling",
-        }
-        compose_hits = sum(
-            1 for n in nodes
-            if tag(n) in {"label", "entry", "push-button", "combo-box", "toggle-button"}
-            and ldisp(n) in compose_signals
-        )
-
-        # "Subject" は entry の name が "Subject"、text に件名が入る等の揺れがあるので補強
-        has_subject_entry = any(
-            tag(n) == "entry" and (ldisp(n) == "subject" or lower_name(n) == "subject")
-            for n in nodes
-        )
+        has_message_body = not pair_set.isdisjoint(self._VIEW_MESSAGE_BODY_PAIRS)
 
         # 2-of-N 以上で確定（強め）
-        if has_message_body and (compose_hits >= 2 or has_subject_entry):
-            return "compose"
+        if has_message_body:
+            # "Subject" は entry の name が "Subject"、text に件名が入る等の揺れがあるので補強
+            # （name が "subject" なら ldisp も "subject" なので集合判定だけで足りる）
+            has_subject_entry = ("entry", "subject") in pair_set
+
+            if compose_hits >= 2 or has_subject_entry:
+                return "compose"
 
         # --- Add-ons Manager guard ---
         # NOTE: document-web の title が必ず "Add-ons Manager" とは限らないので、
         # Add-ons 特有の UI（検索欄 / 見出し / ツールボタン）も確定材料にする。
         is_addons_guard = (
-            any(tag(n) == "document-web" and "add-ons" in ldisp(n) for n in nodes)
-            or any(tag(n) == "entry" and "addons.thunderbird.net" in ldisp(n) for n in nodes)
-            or any(tag(n) == "label" and ldisp(n) == "find more add-ons" for n in nodes)
-            or any(tag(n) == "heading" and ldisp(n) in {"manage your themes", "manage your extensions"} for n in nodes)
-            or any(tag(n) == "push-button" and ldisp(n) == "tools for all add-ons" for n in nodes)
+            not pair_set.isdisjoint(self._VIEW_ADDONS_GUARD_PAIRS)
+            or has_addons_doc
+            or has_addons_url_entry
         )
         if is_addons_guard:
             return "addons_manager"
 
         # --- Account Settings guard (strong) ---
-        if any(
-            tag(n) in {"document-web", "heading", "section"} and "account settings" in ldisp(n)
-            for n in nodes
-        ):
+        if has_account_settings_title:
             return "account_settings"
 
-        acc_kw = {
-            "account name",
-            "message storage",
-            "message store type",
-            "local directory",
-        }
-        acc_hits = sum(
-            1 for n in nodes
-            if tag(n) in {"label", "section", "paragraph"} and ldisp(n) in acc_kw
-        )
         if acc_hits >= 2:
             return "account_settings"
 
-        tree_cnt = sum(1 for n in nodes if tag(n) == "tree-item")
-        if tree_cnt >= 8 and any(tag(n) in {"label", "heading"} and "account" in ldisp(n) for n in nodes):
+        if tree_cnt >= 8 and has_account_label:
             return "account_settings"
 
         # ----------------------------
@@ -1102,84 +1276,56 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         score: Dict[str, float] = defaultdict(float)
 
         # --- mail signals ---
-        mail_keywords = {"quick filter", "message list display options"}
-        if any(ldisp(n) in mail_keywords for n in nodes):
+        if has_mail_keyword:
             score["mail"] += 3
 
         # message rows: tree-item にカンマ含む行が複数ある → メール一覧っぽい
-        msg_row_hits = sum(1 for n in nodes if tag(n) == "tree-item" and "," in disp(n))
         if msg_row_hits >= 2:
             score["mail"] += 3
         elif msg_row_hits == 1:
             score["mail"] += 1
 
         # --- home signals ---
-        home_headings = {
-            "set up another account",
-            "import from another program",
-            "about mozilla thunderbird",
-            "resources",
-        }
-        home_heading_hits = sum(
-            1 for n in nodes
-            if tag(n) == "heading" and ldisp(n) in home_headings
-        )
         score["home"] += min(home_heading_hits * 2, 6)
 
         # --- settings signals ---
         # Settings本体 (document-web=Settings) は強シグナル
-        if any(tag(n) == "document-web" and ldisp(n) == "settings" for n in nodes):
+        if ("document-web", "settings") in pair_set:
             score["settings"] += 6
 
         # 左ナビ (Settings) は Add-ons 画面にも出るので加点を控えめにする
-        settings_nav = {"general", "composition", "privacy & security", "chat"}
-        nav_hits = sum(
-            1 for n in nodes
-            if tag(n) in {"list-item", "label"} and ldisp(n) in settings_nav
-        )
         score["settings"] += min(nav_hits, 2)
 
         # タブ名などで "Settings" セクションがある
-        if any(tag(n) == "section" and ldisp(n) == "settings" for n in nodes):
+        if ("section", "settings") in pair_set:
             score["settings"] += 2
 
         # --- addons signals (guardに落ちなかった時の保険) ---
-        if any(tag(n) == "section" and "add-ons manager" in ldisp(n) for n in nodes):
+        if has_addons_manager_section:
             score["addons_manager"] += 4
-        if any(tag(n) == "document-web" and "add-ons manager" in ldisp(n) for n in nodes):
+        if has_addons_manager_doc:
             score["addons_manager"] += 4
 
-        if any(tag(n) == "entry" and "addons.thunderbird.net" in ldisp(n) for n in nodes):
+        if has_addons_url_entry:
             score["addons_manager"] += 6
-        if any(tag(n) == "label" and ldisp(n) == "find more add-ons" for n in nodes):
+        if ("label", "find more add-ons") in pair_set:
             score["addons_manager"] += 3
-        if any(tag(n) == "heading" and ldisp(n) == "manage your themes" for n in nodes):
+        if ("heading", "manage your themes") in pair_set:
             score["addons_manager"] += 3
-        if any(tag(n) == "push-button" and ldisp(n) == "tools for all add-ons" for n in nodes):
+        if ("push-button", "tools for all add-ons") in pair_set:
             score["addons_manager"] += 3
 
-        addons_nav = {"recommendations", "extensions", "themes", "languages"}
-        addons_hits = sum(
-            1 for n in nodes
-            if tag(n) in {"section", "list-item", "label", "link"}
-            and ldisp(n) in addons_nav
-        )
         score["addons_manager"] += min(addons_hits, 4)
 
         # --- compose signals (guardに落ちなかった時の保険) ---
         # ガードほど強くないが、それっぽさを加点
-        if any(tag(n) == "document-web" and ldisp(n) in {"message body", "body"} for n in nodes):
+        if has_message_body:
             score["compose"] += 6
         # フィールド類が複数あると compose っぽい
-        compose_field_keys = {"from", "to", "subject", "cc", "bcc"}
-        compose_field_hits = sum(
-            1 for n in nodes
-            if tag(n) in {"label", "entry", "combo-box"} and ldisp(n) in compose_field_keys
-        )
         score["compose"] += min(compose_field_hits, 4)
-        if any(tag(n) == "push-button" and ldisp(n) == "send" for n in nodes):
+        if ("push-button", "send") in pair_set:
             score["compose"] += 2
-        if any(tag(n) == "push-button" and ldisp(n) == "attach" for n in nodes):
+        if ("push-button", "attach") in pair_set:
             score["compose"] += 1
 
         # ----------------------------
@@ -1187,7 +1333,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ----------------------------
         MIN_SCORE = 3.0
 
-        top = sorted(score.items(), key=lambda kv: kv[1], reverse=True)
+        top = sorted(score.items(), key=itemgetter(1), reverse=True)
         if not top or top[0][1] < MIN_SCORE:
             return "unknown"
 
@@ -1211,10 +1357,10 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         """
         xs = []
         for n in nodes:
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             if not tag:
                 continue
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             x, y = bbox["x"], bbox["y"]
 
             # Launcher/Spaces（超左）やメニューバーっぽい領域を除外
@@ -1261,10 +1407,10 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         """
         item_ys = []
         for n in nodes:
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             if tag != "tree-item":
                 continue
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             x, y = bbox["x"], bbox["y"]
 
             # メール一覧領域だけ見る（左ペイン）
@@ -1302,7 +1448,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ---------------------------------------------------------
         # 1) FOLDER_LIST（左ペイン）
         # ---------------------------------------------------------
-        folder_nodes = regions["FOLDER_TREE"] + regions["SIDEBAR_HEADER"] + regions["SIDEBAR"]
+        folder_nodes = [*regions["FOLDER_TREE"], *regions["SIDEBAR_HEADER"], *regions["SIDEBAR"]]
         folder_list = self._compress_folder_tree(folder_nodes)
 
         if folder_list:
@@ -1313,7 +1459,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ---------------------------------------------------------
         # 2) メール一覧＋右側ペインを 3 分割する
         # ---------------------------------------------------------
-        candidates = regions["MESSAGE_LIST"] + regions["PREVIEW"] + regions["MAIL_TOOLBAR"]
+        candidates = [*regions["MESSAGE_LIST"], *regions["PREVIEW"], *regions["MAIL_TOOLBAR"]]
         MSG_LIST_LEFT_X = 340 
 
         # ★ここが変更点：固定値ではなく推定
@@ -1327,9 +1473,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         msg_body = []
 
         for n in candidates:
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             x, y = bbox["x"], bbox["y"]
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             name = (n.get("name") or "").strip()
 
             # ============================
@@ -1367,7 +1513,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ---------------------------------------------------------
         if msg_list_header:
             lines.append("=== MESSAGE_LIST_HEADER ===")
-            msg_list_header.sort(key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+            msg_list_header[:] = self._sorted_yx(msg_list_header)
             for n in msg_list_header:
                 lines.append(self._format_node(n))
             lines.append("")
@@ -1378,21 +1524,17 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if msg_list_items:
             lines.append("=== MESSAGE_LIST ===")
 
-            items = [n for n in msg_list_items]
-            items.sort(key=lambda n: node_bbox_from_raw(n)["y"])
+            items = self._sorted_by_keys(msg_list_items, [b["y"] for b in map(self._bbox, msg_list_items)])
 
             seen_list = set()
             for n in items:
                 raw_name = (n.get("name") or "").strip()
                 if not raw_name:
                     continue
-                tag = (n.get("tag") or "").lower()
+                tag = self._text(n)[0]
                 formatted = raw_name.replace(", ", " — ") if tag == "tree-item" else raw_name
 
-                n_copy = dict(n)
-                n_copy["name"] = formatted
-
-                l = self._format_node(n_copy)
+                l = self._format_node(n, tag=tag, name=formatted)
                 if l and l not in seen_list:
                     seen_list.add(l)
                     lines.append(l)
@@ -1403,7 +1545,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ---------------------------------------------------------
         if msg_actions:
             lines.append("=== MESSAGE_ACTIONS ===")
-            msg_actions.sort(key=lambda n: node_bbox_from_raw(n)["x"])
+            msg_actions[:] = self._sorted_by_keys(msg_actions, [b["x"] for b in map(self._bbox, msg_actions)])
             for n in msg_actions:
                 lines.append(self._format_node(n))
             lines.append("")
@@ -1414,11 +1556,11 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if msg_header:
             lines.append("=== MESSAGE_HEADER ===")
 
-            msg_header.sort(key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
+            msg_header[:] = self._sorted_yx(msg_header)
 
             seen_hdr = set()
             for n in msg_header:
-                tag = (n.get("tag") or "").lower()
+                tag = self._text(n)[0]
                 name = (n.get("name") or "").strip()
                 if not name:
                     continue
@@ -1439,11 +1581,11 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ---------------------------------------------------------
         if msg_body:
             lines.append("=== MESSAGE_BODY ===")
-            msg_body.sort(key=lambda n: node_bbox_from_raw(n)["y"])
+            msg_body[:] = self._sorted_by_keys(msg_body, [b["y"] for b in map(self._bbox, msg_body)])
 
             for n in msg_body:
                 name = (n.get("name") or "").strip()
-                tag = (n.get("tag") or "").lower()
+                tag = self._text(n)[0]
 
                 # ノードに本文が存在する場合は “そのまま全文出力”
                 if name:
@@ -1502,11 +1644,11 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         import sys  # DEBUG用
 
         # helper
-        def tag(n): return (n.get("tag") or "").lower()
+        def tag(n): return self._text(n)[0]
         def disp(n): return ((n.get("name") or n.get("text") or n.get("description") or "")).strip()
         def ldisp(n): return disp(n).lower()
         def xy(n):
-            b = node_bbox_from_raw(n)
+            b = self._bbox(n)
             return (b["x"], b["y"])
 
 
@@ -1531,7 +1673,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
             s = ldisp(n)
             if s in {"recommendations", "extensions", "themes", "languages"}:
                 pos = n.get("position")
-                b = node_bbox_from_raw(n)
+                b = self._bbox(n)
                 print("[CHECK-NAV]", s, "pos=", pos, "bbox=", (b["x"], b["y"]), "tag=", tag(n),
                     file=sys.stderr, flush=True)
 
@@ -1560,17 +1702,10 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         addons_toolbar: List[Node] = []
         content: List[Node] = []
 
-        # keywords
-        nav_keys = {
-            "recommendations", "extensions", "themes", "languages",
-            "add-ons support", "thunderbird settings",
-        }
-        tab_keys = {"settings", "add-ons manager", "close tab"}
-        toolbar_keys = {
-            "search addons.thunderbird.net",
-            "tools for all add-ons",
-            "find more add-ons",
-        }
+        # keywords（部分一致はクラス定義の正規表現で1回だけ検索する）
+        nav_search = self._ADDONS_NAV_RE.search
+        tab_search = self._ADDONS_TAB_RE.search
+        toolbar_search = self._ADDONS_TOOLBAR_RE.search
 
         # ----------------------------------------
         # 2) 分類
@@ -1586,19 +1721,19 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
             # --- Tabs area ---
             if y <= TAB_Y_MAX and t in {"section", "push-button"}:
-                if any(k in s for k in tab_keys):
+                if tab_search(s):
                     tabs.append(n)
                     continue
 
             # --- Left navigation ---
             if x <= LEFT_NAV_X_MAX and t in {"list-item", "link", "section", "label"}:
-                if any(k in s for k in nav_keys):
+                if nav_search(s):
                     sidenav.append(n)
                     continue
 
             # --- Add-ons toolbar-ish ---
             if t in {"entry", "push-button", "label"}:
-                if any(k in s for k in toolbar_keys):
+                if toolbar_search(s):
                     addons_toolbar.append(n)
                     continue
 
@@ -1615,12 +1750,12 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ★ SIDENAV は「同一ラベルが link/list-item/section で多重に出る」ので文字列ベースで追加dedup
         #sidenav = self._dedup_nodes(sidenav)
         def xy_bbox(n):
-            b = node_bbox_from_raw(n)
+            b = self._bbox(n)
             return b["x"], b["y"]
             
         seen_nav_text = set()
         sidenav2: List[Node] = []
-        for n in sorted(sidenav, key=lambda n: (xy(n)[1], xy(n)[0])):  # 上から順に
+        for n in self._sorted_yx(sidenav):  # 上から順に
             text = ldisp(n)
             if not text:
                 continue
@@ -1643,7 +1778,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
     def _is_inside_mail_area(self, node: Node, mail_area_nodes: List[Node]) -> bool:
         """
         modal_nodes のうち「メール本文エリア上に出ているものか」を判定する。
-        ★注意: node["bounds"] ではなく node_bbox_from_raw() を使う。
+        ★注意: node["bounds"] ではなく self._bbox() を使う。
         """
         if not mail_area_nodes:
             return False
@@ -1655,7 +1790,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
         # メール本文エリアの外接矩形を作る
         for n in mail_area_nodes:
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             bx, by, bw, bh = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
             xs.append(bx)
             ys.append(by)
@@ -1666,7 +1801,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         min_y, max_y = min(ys), max(ye)
 
         # 判定対象ノードの中心座標
-        bbox = node_bbox_from_raw(node)
+        bbox = self._bbox(node)
         bx, by, bw, bh = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
         cx = bx + bw / 2.0
         cy = by + bh / 2.0
@@ -1692,9 +1827,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         safe_tags = {"toggle-button", "push-button", "heading", "section", "tree-item", "list-item", "static", "label"}
 
         def move_to_background(n: Node) -> None:
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             x, y = bbox["x"], bbox["y"]
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
 
             # 上部帯 → MAIL_TOOLBAR（Quick Filter等）
             if y < TOP_Y:
@@ -1717,7 +1852,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # regions["MODAL"] の誤モーダルを戻す
         new_modal_region: List[Node] = []
         for n in regions.get("MODAL", []):
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             if tag in safe_tags:
                 move_to_background(n)
             else:
@@ -1727,7 +1862,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # diff由来 modal_nodes_for_output の誤モーダルも戻す
         kept: List[Node] = []
         for n in (modal_nodes_for_output or []):
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
             if tag in safe_tags:
                 move_to_background(n)
             else:
@@ -1769,9 +1904,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         }
 
         def is_left_pane_msg_list_node(n: Node) -> bool:
-            bbox = node_bbox_from_raw(n)
+            bbox = self._bbox(n)
             x, y = bbox["x"], bbox["y"]
-            tag = (n.get("tag") or "").lower()
+            tag = self._text(n)[0]
 
             if tag not in MSG_TAGS:
                 return False
@@ -1828,10 +1963,10 @@ class ThunderbirdCompressor(BaseA11yCompressor):
     ) -> dict:
         import sys
 
-        def tag(n): return (n.get("tag") or "").lower()
+        def tag(n): return self._text(n)[0]
         def disp(n): return ((n.get("name") or n.get("text") or n.get("description") or "")).strip()
         def ldisp(n): return disp(n).lower()
-        def bbox(n): return node_bbox_from_raw(n)
+        def bbox(n): return self._bbox(n)
 
         # -----------------------------
         # 0) composeの候補を集める
@@ -1952,7 +2087,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                     fields.append(n)
                     continue
                 # 長文entry対策
-                if t in {"entry", "combo-box"} and any(k in s for k in ("from", "to", "subject")):
+                if t in {"entry", "combo-box"} and self._COMPOSE_FIELD_RE.search(s):
                     fields.append(n)
                     continue
 
@@ -1984,7 +2119,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # body = self._dedup_nodes(body)
 
         # ★ POPUP は “完全一致だけ” 落とす（消える事故防止）
-        popup = sorted(popup, key=lambda n: (bbox(n)["y"], bbox(n)["x"]))
+        popup = self._sorted_yx(popup)
         seen = set()
         popup2: List[Node] = []
         for n in popup:
@@ -2010,8 +2145,8 @@ class ThunderbirdCompressor(BaseA11yCompressor):
     def _compress_menubar(self, nodes: List[Node]) -> List[str]:
         if not nodes:
             return []
-        nodes = sorted(nodes, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-        return self._dedup_lines([self._format_node(n) for n in nodes])
+        nodes = self._sorted_yx(nodes)
+        return self._format_lines(nodes, keep_blank=True)
 
 
     def _compress_compose_actions(self, nodes: List[Node]) -> List[str]:
@@ -2020,23 +2155,23 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # 重要ボタンだけ優先表示
         priority = {"send": 0, "attach": 1, "save": 2, "spelling": 3, "contacts": 4}
         def key(n):
-            s = ((n.get("name") or n.get("text") or "")).strip().lower()
-            b = node_bbox_from_raw(n)
+            s = self._text(n)[1].lower()
+            b = self._bbox(n)
             return (priority.get(s, 99), b["y"], b["x"])
         nodes = sorted(nodes, key=key)
-        return self._dedup_lines([self._format_node(n) for n in nodes])
+        return self._format_lines(nodes, keep_blank=True)
 
 
     def _compress_compose_fields(self, nodes: List[Node]) -> List[str]:
         if not nodes:
             return []
 
-        def t(n): return (n.get("tag") or "").lower()
-        def d(n): return ((n.get("name") or n.get("text") or "")).strip()
+        def t(n): return self._text(n)[0]
+        def d(n): return self._text(n)[1]
         def ld(n): return d(n).lower()
-        def b(n): return node_bbox_from_raw(n)
+        def b(n): return self._bbox(n)
 
-        items = sorted(nodes, key=lambda n: (b(n)["y"], b(n)["x"]))
+        items = self._sorted_yx(nodes)
 
         # label候補
         labels = [n for n in items if t(n) == "label" and ld(n) in {"from", "to", "subject"}]
@@ -2081,7 +2216,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                 keep.append(n)
 
         keep = self._dedup_nodes(keep)
-        keep = sorted(keep, key=lambda n: (b(n)["y"], b(n)["x"]))
+        keep = self._sorted_yx(keep)
         lines.extend([self._format_node(n) for n in keep])
 
         return self._dedup_lines(lines)
@@ -2091,18 +2226,18 @@ class ThunderbirdCompressor(BaseA11yCompressor):
             return []
         # ここは多いので、押せる系＋combo-boxだけに絞る
         allowed = {"push-button", "toggle-button", "combo-box"}
-        filtered = [n for n in nodes if ((n.get("tag") or "").lower() in allowed)]
+        filtered = [n for n in nodes if (self._text(n)[0] in allowed)]
         filtered = self._dedup_nodes(filtered)
-        filtered = sorted(filtered, key=lambda n: (node_bbox_from_raw(n)["y"], node_bbox_from_raw(n)["x"]))
-        return self._dedup_lines([self._format_node(n) for n in filtered])
+        filtered = self._sorted_yx(filtered)
+        return self._format_lines(filtered, keep_blank=True)
 
 
     def _compress_compose_body(self, nodes: List[Node]) -> List[str]:
         if not nodes:
             return []
 
-        def tg(n): return (n.get("tag") or "").lower()
-        def b(n): return node_bbox_from_raw(n)
+        def tg(n): return self._text(n)[0]
+        def b(n): return self._bbox(n)
         def disp(n): return ((n.get("name") or n.get("text") or n.get("description") or "")).strip()
 
         # document-web / paragraph を優先して残す
@@ -2115,7 +2250,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                 if disp(n):
                     keep.append(n)
 
-        keep = sorted(keep, key=lambda n: (b(n)["y"], b(n)["x"]))
+        keep = self._sorted_yx(keep)
 
         # ★ BODY だけは dedup を強くかけない（文章が消える事故防止）
         # 代わりに “完全一致の重複” だけ落とす
@@ -2138,7 +2273,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         if not diff_nodes:
             return {"popup": [], "body_like": [], "field_like": [], "other": []}
 
-        def tg(n): return (n.get("tag") or "").lower()
+        def tg(n): return self._text(n)[0]
         def disp(n): return ((n.get("name") or n.get("text") or n.get("description") or "")).strip().lower()
 
         POPUP_TAGS = {"menu", "menu-item", "check-menu-item", "radio-menu-item", "check-menu-item"}
@@ -2183,13 +2318,8 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         lines: List[str] = []
 
         # --- view type detect ---
-        all_nodes_for_detect: List[Node] = []
-        for lst in regions.values():
-            all_nodes_for_detect.extend(lst)
-        if modal_nodes:
-            all_nodes_for_detect.extend(modal_nodes)
-
-        view_type = self._detect_view_type(all_nodes_for_detect)
+        # ★全ノードを1本のリストに詰め直さず、region のリスト群をそのまま渡す
+        view_type = self._detect_view_type((*regions.values(), modal_nodes or []))
 
         lines.append(f"DEBUG_VIEW_TYPE: {view_type}")
         print(f"[DEBUG] VIEW_TYPE = {view_type}", file=sys.stderr, flush=True)
@@ -2230,7 +2360,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
             if rescued_nodes:
                 # CONTENT にマージ（＝本文扱い）
-                regions["CONTENT"] = list(regions.get("CONTENT") or []) + rescued_nodes
+                regions["CONTENT"] = [*(regions.get("CONTENT") or []), *rescued_nodes]
 
             # MODALとしては出さない
             regions["MODAL"] = []
@@ -2242,7 +2372,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
             def _count_tag(ns, t):
                 t = t.lower()
-                return sum(1 for n in (ns or []) if (n.get("tag") or "").lower() == t)
+                return sum(1 for n in (ns or []) if self._text(n)[0] == t)
 
             print("[DEBUG] tree-item counts:",
                 "SIDEBAR", _count_tag(regions.get("SIDEBAR"), "tree-item"),
@@ -2284,13 +2414,13 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         # ----------------------------------------
         if view_type == "home":
             if r := self._compress_folder_tree(
-                regions["FOLDER_TREE"] + regions["SIDEBAR_HEADER"] + regions["SIDEBAR"]
+                [*regions["FOLDER_TREE"], *regions["SIDEBAR_HEADER"], *regions["SIDEBAR"]]
             ):
                 lines.append("=== FOLDERS ===")
                 lines.extend(r)
                 lines.append("")
 
-            if r := self._compress_home_dashboard(regions["HOME_DASHBOARD"] + regions["DASHBOARD"]):
+            if r := self._compress_home_dashboard([*regions["HOME_DASHBOARD"], *regions["DASHBOARD"]]):
                 lines.append("=== HOME DASHBOARD ===")
                 lines.extend(r)
                 lines.append("")
@@ -2331,12 +2461,12 @@ class ThunderbirdCompressor(BaseA11yCompressor):
             )
             # addons manager view 専用ロジック
             # 1) 必要な個別領域を組み立てる（regionsを直接いじらず dict を返すのが安全）
-            modal_candidates = list(suppressed_modal_candidates) + list(modal_nodes_for_output)
+            modal_candidates = [*suppressed_modal_candidates, *modal_nodes_for_output]
 
             # ★ここが重要：regions 側に“材料”として戻す
             # regions["CONTENT"] が addons 本体を担うなら、そこへ合流（適切なキーは実装に合わせて）
             regions_for_am = dict(regions)
-            regions_for_am["CONTENT"] = list(regions.get("CONTENT", [])) + modal_candidates
+            regions_for_am["CONTENT"] = [*regions.get("CONTENT", []), *modal_candidates]
 
             am = self._build_addons_manager_view(regions_for_am, modal_candidates, screen_w, screen_h)
 
@@ -2423,9 +2553,9 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
             def add_mail_area_candidates(nodes: List[Node]) -> None:
                 for n in nodes:
-                    bbox = node_bbox_from_raw(n)
+                    bbox = self._bbox(n)
                     x, y = bbox["x"], bbox["y"]
-                    tag = (n.get("tag") or "").lower()
+                    tag = self._text(n)[0]
 
                     if x >= SPLIT_MSG_LIST_X and tag in {
                         "document-web",
@@ -2497,7 +2627,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
 
             if cv.get("POPUP"):
                 lines.append("=== COMPOSE POPUP ===")
-                lines += [self._format_node(n) for n in cv["POPUP"] if self._format_node(n)]
+                lines += [l for l in map(self._format_node, cv["POPUP"]) if l]
 
             lines.append("\n=== COMPOSE BODY ===")
             lines.extend(self._compress_compose_body(cv.get("BODY", [])))
@@ -2506,7 +2636,7 @@ class ThunderbirdCompressor(BaseA11yCompressor):
         else:
             # Generic / その他ビュー (古いメール画面など)
             if r := self._compress_folder_tree(
-                regions["FOLDER_TREE"] + regions["SIDEBAR_HEADER"] + regions["SIDEBAR"]
+                [*regions["FOLDER_TREE"], *regions["SIDEBAR_HEADER"], *regions["SIDEBAR"]]
             ):
                 lines.append("=== FOLDERS ===")
                 lines.extend(r)
@@ -2554,4 +2684,6 @@ class ThunderbirdCompressor(BaseA11yCompressor):
                 lines.append("=== MODAL / DIALOG ===")
                 lines.extend(r)
 
+        self._bbox_cache.clear()
+        self._text_cache.clear()
         return lines